@@ -1,32 +1,49 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.auth import get_current_user
+from app.core.database import get_async_db
 from app.schemas.article import *
 from app.services.functions import article_functions
 from app.core.logging import logger
 from app.schemas.user import User
-from app.core.permission import verify_article_ownership
 router = APIRouter()
 
 @router.post("/search", response_model=SearchResponse)
 async def search_articles(
     request: SearchArticleRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    results = await article_functions.search_articles(
+    # Return the connection authentication used; search does not need it
+    await db.close()
+    results, next_cursor = await article_functions.search_articles_page(
         request.query,
-        request.limit
+        request.limit,
+        user_id=request.user_id,
+        username=request.username,
+        created_after=request.created_after,
+        created_before=request.created_before,
+        tags=request.tags,
+        mode=request.mode,
+        two_stage=request.two_stage,
+        offset=request.offset,
+        cursor=request.cursor,
+        score_threshold=request.score_threshold
     )
-    return SearchResponse(results=results)
+    return SearchResponse(results=results, next_cursor=next_cursor)
 
 @router.post("/create", response_model=ArticleResponse)
 async def create_article(
     request: CreateArticleRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         article = await article_functions.create_article(
             json_data=request.json_data,
-            user_id=current_user.id
+            user_id=current_user.id,
+            wait_for_index=request.wait_for_index,
+            db=db
         )
         return ArticleResponse(
             id=article.id,
@@ -47,26 +64,31 @@ async def create_article(
 @router.post("/delete")
 async def delete_article(
     request: DeleteArticleRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Check ownership before deleting
-    await verify_article_ownership(request.article_id, current_user.id)
+    # Ownership is checked by delete_article's fetch
     return await article_functions.delete_article(
         article_id=request.article_id,
-        user_id=current_user.id
+        user_id=current_user.id,
+        wait_for_index=request.wait_for_index,
+        db=db
     )
 
 @router.post("/update", response_model=ArticleResponse)
 async def update_article(
     request: UpdateArticleRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        await verify_article_ownership(request.article_id, current_user.id)
+        # Ownership is checked by update_article's fetch
         article = await article_functions.update_article(
             article_id=request.article_id,
             json_data=request.json_data,
-            user_id=current_user.id
+            user_id=current_user.id,
+            wait_for_index=request.wait_for_index,
+            db=db
         )
         return ArticleResponse(
             id=article.id,
@@ -77,6 +99,9 @@ async def update_article(
             content_json=article.content_json,
             created_at=article.created_at.isoformat()
         )
+    except HTTPException:
+        # 404 / 403 from the ownership check
+        raise
     except Exception as e:
         logger.error(f"Error updating article: {str(e)}")
         raise HTTPException(
@@ -84,13 +109,45 @@ async def update_article(
             detail="Failed to update article"
         )
 
+@router.post("/list", response_model=ListArticlesResponse)
+async def list_articles(
+    request: ListArticlesRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    full = request.view == "full"
+    articles, next_cursor = await article_functions.list_articles(
+        request.limit,
+        user_id=request.user_id,
+        username=request.username,
+        cursor=request.cursor,
+        include_content=full,
+        db=db
+    )
+    return ListArticlesResponse(
+        articles=[
+            ArticleListItem(
+                id=article.id,
+                user_id=article.user_id,
+                title=article.title,
+                username=article.username,
+                created_at=article.created_at.isoformat(),
+                content_text=article.content_text if full else None,
+                content_json=article.content_json if full else None
+            )
+            for article in articles
+        ],
+        next_cursor=next_cursor
+    )
+
 @router.post("/get", response_model=ArticleResponse)
 async def get_article(
     request: GetArticleRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        article = await article_functions.get_article(request.article_id)
+        article = await article_functions.get_article(request.article_id, db=db)
         return ArticleResponse(
             id=article.id,
             user_id=article.user_id,
@@ -2,8 +2,10 @@
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import User
-from app.core.database import SessionLocal
+from app.core.database import get_async_db
 from app.core.logging import logger
 import jwt
 from datetime import datetime, timedelta
@@ -11,33 +13,33 @@ from app.core.config import settings
 
 security = HTTPBearer()
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     Verify token and return current user.
     This is a development version - will be replaced with Firebase verification
+    The user is loaded into the request's session, which routes share.
     """
     try:
         # Verify token
         payload = jwt.decode(credentials.credentials, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         
         # Get user from database
-        db = SessionLocal()
-        try:
-            user = db.query(User).filter(User.firebase_uid == payload["uid"]).first()
-            if user is None:
-                # For development: Create user if not exists
-                user = User(
-                    firebase_uid=payload["uid"],
-                    email=payload.get("email"),
-                    # username=f"user_{payload['uid'][:8]}"
-                    username=f"{payload['uid'][:8]}"
-                )
-                db.add(user)
-                db.commit()
-                db.refresh(user)
-            return user
-        finally:
-            db.close()
+        user = await db.scalar(select(User).where(User.firebase_uid == payload["uid"]))
+        if user is None:
+            # For development: Create user if not exists
+            user = User(
+                firebase_uid=payload["uid"],
+                email=payload.get("email"),
+                # username=f"user_{payload['uid'][:8]}"
+                username=f"{payload['uid'][:8]}"
+            )
+            db.add(user)
+            await db.commit()
+            await db.refresh(user)
+        return user
             
     except jwt.PyJWTError as e:
         logger.error(f"Token verification failed: {e}")
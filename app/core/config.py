@@ -1,9 +1,18 @@
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 from typing import Optional
 
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
+    # Connection pool per engine and worker (sync for scripts, asyncpg for requests)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # asyncpg prepared statement cache; 0 when connecting through pgbouncer (transaction mode)
+    DB_STATEMENT_CACHE_SIZE: int = 100
 
     # OpenAI
     OPENAI_API_KEY: str
@@ -11,6 +20,11 @@ class Settings(BaseSettings):
     # Server
     HOST: str
     PORT: int
+    # Worker processes forked by serve.py
+    WORKERS: int = 2
+
+    # Seconds from import to warmed-up services before a warning is logged
+    STARTUP_BUDGET_SECONDS: float = 60.0
 
     # Redis
     REDIS_URL: str
@@ -22,11 +36,109 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     
-    QDRANT_CLIENT_URL: str
-    QDRANT_CLIENT_PORT: int
+    # "qdrant", or "local" for the in-process index (dev, CI, small deployments)
+    VECTOR_STORE_BACKEND: str = "qdrant"
+    VECTOR_STORE_PERSIST: bool = True
+    # Journaled batches before the local store rewrites its index snapshot
+    VECTOR_STORE_JOURNAL_MAX_BATCHES: int = 1000
+
+    QDRANT_CLIENT_URL: str = ""
+    QDRANT_CLIENT_PORT: int = 6333
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_PREFER_GRPC: bool = False
+    # Max pooled keep-alive REST connections per worker
+    QDRANT_POOL_SIZE: int = 32
+    # HNSW graph (applied when the collection is created); QDRANT_HNSW_EF=0 keeps Qdrant's default
+    QDRANT_HNSW_M: int = 16
+    QDRANT_HNSW_EF_CONSTRUCT: int = 100
+    QDRANT_HNSW_EF: int = 0
+    # Vector quantization: none | scalar | binary, with originals optionally on disk
+    QDRANT_QUANTIZATION: str = "none"
+    QDRANT_QUANTIZATION_ALWAYS_RAM: bool = True
+    QDRANT_VECTORS_ON_DISK: bool = False
+    QDRANT_OVERSAMPLING: float = 2.0
+    QDRANT_RESCORE: bool = True
+    # Buffered vector writes: flush by article count or interval
+    VECTOR_WRITE_BATCH_SIZE: int = 128
+    VECTOR_WRITE_INTERVAL_MS: float = 200.0
+    VECTOR_WRITE_MAX_PENDING: int = 2048
     
     EMBEDDING_MODEL: str
     EMBEDDING_DIM: int
+    # Concurrent get_embedding calls are coalesced into one forward pass
+    EMBEDDING_MAX_BATCH_SIZE: int = 32
+    EMBEDDING_MAX_WAIT_MS: float = 5.0
+    # Rows per forward pass for get_embeddings (bulk import / reindex)
+    EMBEDDING_BULK_BATCH_SIZE: int = 64
+    # Embedding cache keyed by hash(model, text); backend is memory, redis or disk
+    EMBEDDING_CACHE_SIZE: int = 10000
+    EMBEDDING_CACHE_BACKEND: str = "memory"
+    EMBEDDING_CACHE_TTL: int = 604800
+    # Inference thread pool; intra-op threads for torch/ONNX Runtime (0 keeps the default)
+    EMBEDDING_EXECUTOR_WORKERS: int = 1
+    EMBEDDING_INTRA_OP_THREADS: int = 0
+    # torch | onnx | onnx-int8; ONNX files default to STORAGE_PATH/onnx/<model>
+    EMBEDDING_BACKEND: str = "torch"
+    EMBEDDING_ONNX_DIR: str = ""
+    # Long articles are indexed as overlapping token windows, one Qdrant point each
+    EMBEDDING_CHUNK_TOKENS: int = 256
+    EMBEDDING_CHUNK_OVERLAP: int = 32
+    # Chunk hits are folded back per article with "max" or "sum_top_k"
+    SEARCH_CHUNK_AGGREGATION: str = "max"
+    SEARCH_CHUNK_TOP_K: int = 3
+    # "vector", or opt in to "hybrid" (vector + Postgres lexical, fused with reciprocal
+    # rank fusion). Hybrid needs pg_trgm and the lexical indexes (scripts/provision_db.py),
+    # and its scores are RRF ranks (~0.01-0.03), not cosine similarities
+    SEARCH_MODE: str = "vector"
+    SEARCH_RRF_K: int = 60
+    # Candidates fetched from each leg before fusion
+    SEARCH_HYBRID_CANDIDATES: int = 50
+    # Two-stage search: low-ef quantized prefetch of SEARCH_PREFETCH_LIMIT chunks rescored
+    # with the original vectors in Qdrant, then an optional cross-encoder over the top SEARCH_RERANK_TOP_N
+    SEARCH_TWO_STAGE: bool = False
+    SEARCH_PREFETCH_LIMIT: int = 200
+    SEARCH_PREFETCH_EF: int = 64
+    SEARCH_RERANKER_MODEL: str = ""
+    SEARCH_RERANK_TOP_N: int = 30
+    SEARCH_RERANK_BATCH_SIZE: int = 16
+    # Paged search fetches and caches the ranking this many results at a time
+    SEARCH_PAGE_WINDOW: int = 50
+    SEARCH_MAX_DEPTH: int = 1000
+    # Outbox indexer: article writes are indexed asynchronously from the index_outbox table.
+    # Disable it in processes that should not drain (see scripts/run_indexer.py).
+    INDEXER_ENABLED: bool = True
+    INDEXER_BATCH_SIZE: int = 64
+    INDEXER_POLL_INTERVAL_MS: float = 500.0
+    # Failed rows back off exponentially (base * 2^attempts, capped) and are left for
+    # scripts/run_indexer.py --redrive after INDEXER_MAX_ATTEMPTS
+    INDEXER_MAX_ATTEMPTS: int = 10
+    INDEXER_RETRY_BASE_SECONDS: float = 1.0
+    INDEXER_RETRY_MAX_SECONDS: float = 300.0
+    INDEXER_WAIT_TIMEOUT: float = 30.0
+    INDEXER_RETENTION_HOURS: int = 24
+    # Ids per Qdrant scroll page / Postgres fetch in scripts/reconcile_vectors.py
+    RECONCILE_BATCH_SIZE: int = 1000
+    # Result cache invalidated on every article write; memory (per process),
+    # redis (opt-in, shared by workers; needs REDIS_URL) or none
+    SEARCH_CACHE_BACKEND: str = "memory"
+    SEARCH_CACHE_SIZE: int = 2000
+    SEARCH_CACHE_TTL: int = 300
+    # Stored vector size: "none", "pca" (fit with scripts/dim_reduction.py) or "truncate"
+    EMBEDDING_REDUCTION: str = "none"
+    EMBEDDING_REDUCED_DIM: int = 0
+    EMBEDDING_PCA_PATH: str = ""
+
+    @model_validator(mode="after")
+    def check_reduction(self):
+        # A zero or oversized target would create a collection of empty or padded vectors
+        if self.EMBEDDING_REDUCTION not in ("none", "pca", "truncate"):
+            raise ValueError(f"Unknown EMBEDDING_REDUCTION: {self.EMBEDDING_REDUCTION}")
+        if self.EMBEDDING_REDUCTION != "none" and not 0 < self.EMBEDDING_REDUCED_DIM <= self.EMBEDDING_DIM:
+            raise ValueError(
+                f"EMBEDDING_REDUCTION={self.EMBEDDING_REDUCTION} needs 0 < EMBEDDING_REDUCED_DIM <= "
+                f"EMBEDDING_DIM ({self.EMBEDDING_DIM}), got {self.EMBEDDING_REDUCED_DIM}"
+            )
+        return self
 
     class Config:
         env_file = ".env"
@@ -1,15 +1,81 @@
-from sqlalchemy import create_engine
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+POOL_OPTIONS = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING
+}
+
+# Scripts and background threads (indexer, reconciler)
+engine = create_engine(settings.DATABASE_URL, **POOL_OPTIONS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with the asyncpg driver, whichever sync driver it names"""
+    parsed = make_url(url)
+    query = dict(parsed.query)
+    # asyncpg spells libpq's sslmode as ssl
+    if "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    # SQLAlchemy's own prepared statement cache, on top of asyncpg's
+    query["prepared_statement_cache_size"] = str(settings.DB_STATEMENT_CACHE_SIZE)
+    return parsed.set(drivername="postgresql+asyncpg", query=query).render_as_string(hide_password=False)
+
+# Request handlers; never blocks the event loop.
+# Set DB_STATEMENT_CACHE_SIZE=0 behind pgbouncer in transaction mode.
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    connect_args={"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+    **POOL_OPTIONS
+)
+# Objects stay usable after commit; lazy loads would need a greenlet outside the session
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    """Request-scoped session; FastAPI caches it, so auth, permission checks and the route share it"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+@asynccontextmanager
+async def session_scope(db: Optional[AsyncSession] = None):
+    """The caller's session if given, otherwise a new one closed on exit"""
+    if db is not None:
+        yield db
+    else:
+        async with AsyncSessionLocal() as db:
+            yield db
+
+# Statements executed in the current request (see count_queries)
+_query_counter: ContextVar[Optional[List[int]]] = ContextVar("query_counter", default=None)
+
+def count_queries() -> List[int]:
+    """Count statements executed from this context on; the count is read from the returned list"""
+    counter = [0]
+    _query_counter.set(counter)
+    return counter
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+event.listen(engine, "before_cursor_execute", _count_query)
+event.listen(async_engine.sync_engine, "before_cursor_execute", _count_query)
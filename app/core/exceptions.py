@@ -23,6 +23,14 @@ class ArticleNotFoundError(APIError):
             error_code="ARTICLE_NOT_FOUND"
         )
 
+class ArticlePermissionError(APIError):
+    def __init__(self, article_id: str):
+        super().__init__(
+            status_code=403,
+            message=f"Not authorized to modify article {article_id}",
+            error_code="ARTICLE_FORBIDDEN"
+        )
+
 class ValidationError(APIError):
     def __init__(self, message: str, details: Dict[str, Any] = None):
         super().__init__(
@@ -0,0 +1,82 @@
+import threading
+from collections import defaultdict, deque
+from typing import Dict, Any
+
+class Metrics:
+    """In-process counters, gauges and timing summaries exposed on /metrics"""
+
+    def __init__(self, reservoir_size: int = 1024):
+        self._lock = threading.Lock()
+        self._reservoir_size = reservoir_size
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+        self._summaries: Dict[str, Dict[str, Any]] = {}
+
+    def incr(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float):
+        with self._lock:
+            self._gauges[name] = value
+
+    def add_gauge(self, name: str, delta: float):
+        with self._lock:
+            self._gauges[name] = self._gauges.get(name, 0) + delta
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            summary = self._summaries.get(name)
+            if summary is None:
+                summary = {
+                    "count": 0,
+                    "sum": 0.0,
+                    "max": value,
+                    "recent": deque(maxlen=self._reservoir_size)
+                }
+                self._summaries[name] = summary
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["max"] = max(summary["max"], value)
+            summary["recent"].append(value)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            summaries = {}
+            for name, summary in self._summaries.items():
+                recent = sorted(summary["recent"])
+                summaries[name] = {
+                    "count": summary["count"],
+                    "avg": summary["sum"] / summary["count"],
+                    "max": summary["max"],
+                    "p50": _percentile(recent, 0.50),
+                    "p95": _percentile(recent, 0.95),
+                    "p99": _percentile(recent, 0.99)
+                }
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "summaries": summaries
+            }
+
+def process_memory() -> Dict[str, int]:
+    """RSS/PSS of this process in kB, read from /proc (Linux only)"""
+    wanted = {"Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"}
+    memory = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if parts and parts[0].rstrip(":") in wanted:
+                    memory[parts[0].rstrip(":").lower() + "_kb"] = int(parts[1])
+    except OSError:
+        pass
+    return memory
+
+def _percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(q * len(sorted_values)))
+    return sorted_values[index]
+
+metrics = Metrics()
@@ -1,27 +1,25 @@
 # app/core/permissions.py
 
-from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import Article
-from app.core.database import SessionLocal
+from app.core.exceptions import ArticleNotFoundError, ArticlePermissionError
 from uuid import UUID
 
-async def verify_article_ownership(article_id: UUID, user_id: UUID) -> bool:
-    """Verify if user is the owner of the article"""
-    db = SessionLocal()
-    try:
-        article = db.query(Article).filter(Article.id == article_id).first()
-        if not article:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Article not found"
-            )
-        
-        if article.user_id != user_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to modify this article"
-            )
-            
-        return True
-    finally:
-        db.close()
\ No newline at end of file
+async def get_owned_article(db: AsyncSession, article_id: UUID, user_id: UUID, for_update: bool = False) -> Article:
+    """Fetch an article together with the ownership check, in one query.
+
+    `for_update` locks the row until the caller commits. A second query, to
+    tell a missing article from someone else's, only runs when the first one
+    finds nothing.
+    """
+    statement = select(Article).where(Article.id == article_id, Article.user_id == user_id)
+    if for_update:
+        statement = statement.with_for_update()
+    article = await db.scalar(statement)
+    if article is None:
+        if await db.scalar(select(Article.id).where(Article.id == article_id)) is None:
+            raise ArticleNotFoundError(str(article_id))
+        raise ArticlePermissionError(str(article_id))
+    return article
+
@@ -2,6 +2,7 @@ from .base import Base
 from .user import User
 from .article import Article
 from .chat import ChatMessage
+from .index_outbox import IndexOutbox
 
 # This ensures all models are loaded when importing from models
-__all__ = ['Base', 'BaseModel', 'User', 'Article', 'ChatMessage']
\ No newline at end of file
+__all__ = ['Base', 'BaseModel', 'User', 'Article', 'ChatMessage', 'IndexOutbox']
\ No newline at end of file
@@ -1,10 +1,17 @@
-from sqlalchemy import Column, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Text, DateTime, ForeignKey, Index, literal_column
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
 from .base import BaseModel
 
+def _tsvector(title, content_text):
+    # Constants are inlined, not bound, so queries render exactly like the index expression
+    return func.to_tsvector(
+        literal_column("'simple'::regconfig"),
+        func.coalesce(title, literal_column("''")) + literal_column("' '") + func.coalesce(content_text, literal_column("''"))
+    )
+
 class Article(BaseModel):
     __tablename__ = "articles"
 
@@ -23,6 +30,35 @@ class Article(BaseModel):
 
     # Relationships
     user = relationship("User", back_populates="articles")
+
+    # Server-generated created_at / updated_at come back with RETURNING instead of a refresh query
+    __mapper_args__ = {"eager_defaults": True}
+
+    # Expression indexes must be attached to the table explicitly, or create_all skips them
+    __table_args__ = (
+        Index("ix_articles_fts", _tsvector(title, content_text), postgresql_using="gin"),
+    )
     
     def __repr__(self):
-        return f"<Article {self.title}>"
\ No newline at end of file
+        return f"<Article {self.title}>"
+
+def article_tsvector():
+    """Expression behind the full-text GIN index; lexical search must use the same one"""
+    return _tsvector(Article.title, Article.content_text)
+
+# Lexical search indexes (pg_trgm must be installed, see scripts/provision_db.py).
+# The "simple" config does not stem, so Korean text is matched by trigrams.
+Index(
+    "ix_articles_title_trgm", Article.title,
+    postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}
+)
+Index(
+    "ix_articles_content_trgm", Article.content_text,
+    postgresql_using="gin", postgresql_ops={"content_text": "gin_trgm_ops"}
+)
+
+# Keyset pagination for /articles/list: each page is one backward index range scan,
+# so deep pages cost the same as the first
+Index("ix_articles_created_at_id", Article.created_at, Article.id)
+Index("ix_articles_user_id_created_at_id", Article.user_id, Article.created_at, Article.id)
+Index("ix_articles_username_created_at_id", Article.username, Article.created_at, Article.id)
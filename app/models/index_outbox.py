@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Text, DateTime, Integer, Index
+from sqlalchemy.dialects.postgresql import UUID
+from .base import BaseModel
+
+class IndexOutbox(BaseModel):
+    """Pending vector index change, written in the same transaction as the article change"""
+    __tablename__ = "index_outbox"
+
+    # No foreign key: delete events must outlive the article row
+    article_id = Column(UUID(as_uuid=True), nullable=False)
+    operation = Column(Text, nullable=False)  # 'upsert' or 'delete'
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    # Not claimed again before this time after a failure (exponential backoff)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # The indexer only ever scans unprocessed rows, oldest first
+        Index(
+            "ix_index_outbox_pending", "created_at",
+            postgresql_where=processed_at.is_(None)
+        ),
+    )
+
+    def __repr__(self):
+        return f"<IndexOutbox {self.operation} {self.article_id}>"
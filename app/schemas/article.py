@@ -11,22 +11,50 @@ from datetime import datetime
 #     pass
 class CreateArticleRequest(BaseModel):
     json_data: dict = Field(..., description="JSON data containing post information")
+    # Block until the article is searchable instead of returning right after the commit
+    wait_for_index: bool = False
 
 class UpdateArticleRequest(BaseModel):
     article_id: UUID4
     json_data: dict = Field(..., description="JSON data containing post information")
+    wait_for_index: bool = False
 
 class SearchArticleRequest(BaseModel):
     query: str
     # limit: Optional[int] = 10
     limit: int = Field(default=10, ge=1, le=100)
+    # Optional filters, pushed down to Qdrant
+    user_id: Optional[UUID4] = None
+    username: Optional[str] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    tags: Optional[List[str]] = None
+    # "vector" or "hybrid"; defaults to SEARCH_MODE
+    mode: Optional[str] = Field(default=None, pattern="^(vector|hybrid)$")
+    # Prefetch + exact rerank; defaults to SEARCH_TWO_STAGE
+    two_stage: Optional[bool] = None
+    # Paging: either a result offset or the next_cursor of the previous page
+    offset: int = Field(default=0, ge=0)
+    cursor: Optional[str] = None
+    # Minimum vector similarity; in hybrid mode keyword matches are kept regardless
+    score_threshold: Optional[float] = Field(default=None, ge=-1, le=1)
 
 class DeleteArticleRequest(BaseModel):
     article_id: UUID4
+    wait_for_index: bool = False
 
 class GetArticleRequest(BaseModel):
     article_id: UUID4
 
+class ListArticlesRequest(BaseModel):
+    limit: int = Field(default=20, ge=1, le=100)
+    user_id: Optional[UUID4] = None
+    username: Optional[str] = None
+    # next_cursor of the previous page
+    cursor: Optional[str] = None
+    # "summary" leaves out content_text and content_json; "full" includes them
+    view: str = Field(default="summary", pattern="^(summary|full)$")
+
 
 
 
@@ -42,6 +70,21 @@ class ArticleResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ArticleListItem(BaseModel):
+    id: UUID4
+    user_id: UUID4
+    title: str
+    username: str
+    created_at: str
+    # Only in the "full" view
+    content_text: Optional[str] = None
+    content_json: Optional[dict] = None
+
+class ListArticlesResponse(BaseModel):
+    articles: List[ArticleListItem]
+    # Pass back as `cursor` to fetch the next page; None on the last page
+    next_cursor: Optional[str] = None
+
 class SearchResult(BaseModel):
     id: UUID4
     title: str
@@ -50,4 +93,6 @@ class SearchResult(BaseModel):
     score: float
 
 class SearchResponse(BaseModel):
-    results: List[SearchResult]
\ No newline at end of file
+    results: List[SearchResult]
+    # Pass back as `cursor` to fetch the next page; None on the last page
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,174 @@
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import metrics
+
+def _embedding_service():
+    from .embedding import EmbeddingService
+    return EmbeddingService()
+
+def _vector_store():
+    if settings.VECTOR_STORE_BACKEND == "local":
+        from .local_vector_store import LocalVectorStore
+        return LocalVectorStore()
+    from .vector_store import VectorStore
+    return VectorStore()
+
+def _vector_writer():
+    from .vector_writer import VectorWriter
+    # Flushed writes change search results, so they invalidate the search cache
+    return VectorWriter(services.get("vector_store"), on_flush=services.get("search_cache").invalidate)
+
+def _search_cache():
+    from .search_cache import SearchCache
+    return SearchCache()
+
+def _indexer():
+    from .indexer import OutboxIndexer
+    return OutboxIndexer(services.get("embedding_service"), services.get("vector_writer"))
+
+def _reranker():
+    from .reranker import CrossEncoderReranker
+    return CrossEncoderReranker(settings.SEARCH_RERANKER_MODEL)
+
+def _generation_service():
+    from .generation import GenerationService
+    return GenerationService()
+
+class ServiceContainer:
+    """Builds the heavy services on first use (or during warmup) instead of at import time"""
+
+    factories: Dict[str, Callable[[], Any]] = {
+        "embedding_service": _embedding_service,
+        "vector_store": _vector_store,
+        "vector_writer": _vector_writer,
+        "search_cache": _search_cache,
+        "reranker": _reranker,
+        "indexer": _indexer,
+        "generation_service": _generation_service,
+    }
+
+    def __init__(self):
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self._created_at = time.perf_counter()
+        self.ready = False
+        self.startup_seconds: Optional[float] = None
+        self.warmup_error: Optional[str] = None
+
+    def get(self, name: str) -> Any:
+        """Return the service, building it on first call (blocking)"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                started = time.perf_counter()
+                instance = self.factories[name]()
+                elapsed = time.perf_counter() - started
+                metrics.set_gauge(f"startup.{name}_seconds", elapsed)
+                logger.info(f"Initialized {name} in {elapsed:.2f}s")
+                self._instances[name] = instance
+        return instance
+
+    async def aget(self, name: str) -> Any:
+        """Like get(), but builds the service off the event loop"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        return await asyncio.to_thread(self.get, name)
+
+    async def get_embedding_service(self):
+        return await self.aget("embedding_service")
+
+    async def get_vector_store(self):
+        return await self.aget("vector_store")
+
+    async def get_vector_writer(self):
+        return await self.aget("vector_writer")
+
+    async def get_search_cache(self):
+        return await self.aget("search_cache")
+
+    async def get_reranker(self):
+        return await self.aget("reranker")
+
+    async def get_indexer(self):
+        return await self.aget("indexer")
+
+    async def get_generation_service(self):
+        return await self.aget("generation_service")
+
+    async def warmup(self):
+        """Build every service, run a dummy inference and mark the app ready.
+
+        The outbox indexer is started first and independently, since it retries
+        on its own; failed readiness checks (Qdrant, Redis down at boot) are
+        retried with backoff instead of leaving the app unready until a restart.
+        """
+        if settings.VECTOR_STORE_BACKEND == "local" and not settings.INDEXER_ENABLED:
+            logger.warning(
+                "VECTOR_STORE_BACKEND=local with INDEXER_ENABLED=false: an external indexer "
+                "cannot write to this process's index, so new articles will not be searchable"
+            )
+        indexer_started = not settings.INDEXER_ENABLED
+        delay = 1.0
+        while True:
+            if not indexer_started:
+                try:
+                    indexer = await self.get_indexer()
+                    indexer.start()
+                    indexer_started = True
+                except Exception as e:
+                    logger.error(f"Outbox indexer failed to start: {e}")
+            try:
+                # Article writes insert into index_outbox, so they fail without it
+                from .indexer import check_outbox_schema
+                await asyncio.to_thread(check_outbox_schema)
+                embedding_service = await self.get_embedding_service()
+                await embedding_service.warmup()
+                vector_store = await self.get_vector_store()
+                await vector_store.ensure_collection()
+                if settings.SEARCH_RERANKER_MODEL:
+                    await self.get_reranker()
+                generation_service = await self.get_generation_service()
+                await asyncio.to_thread(generation_service.redis.ping)
+                if indexer_started:
+                    break
+            except Exception as e:
+                self.warmup_error = str(e)
+                logger.error(f"Service warmup failed, retrying in {delay:.0f}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60.0)
+
+        self.warmup_error = None
+        self.startup_seconds = time.perf_counter() - self._created_at
+        metrics.set_gauge("startup.ready_seconds", self.startup_seconds)
+        self.ready = True
+        if self.startup_seconds > settings.STARTUP_BUDGET_SECONDS:
+            logger.warning(
+                f"Startup took {self.startup_seconds:.2f}s, "
+                f"over the {settings.STARTUP_BUDGET_SECONDS:.0f}s budget"
+            )
+        else:
+            logger.info(f"Services ready in {self.startup_seconds:.2f}s")
+
+    async def shutdown(self):
+        """Stop the indexer and flush buffered writes before the process exits"""
+        indexer = self._instances.get("indexer")
+        if indexer is not None:
+            await indexer.close()
+        vector_writer = self._instances.get("vector_writer")
+        if vector_writer is not None:
+            await vector_writer.close()
+        # The local store snapshots its journal; Qdrant has nothing to flush
+        vector_store = self._instances.get("vector_store")
+        if vector_store is not None and hasattr(vector_store, "close"):
+            await vector_store.close()
+
+services = ServiceContainer()
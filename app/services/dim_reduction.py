@@ -0,0 +1,63 @@
+from pathlib import Path
+import numpy as np
+from app.core.config import settings
+from app.core.logging import logger
+
+def pca_path(dim: int) -> Path:
+    if settings.EMBEDDING_PCA_PATH:
+        return Path(settings.EMBEDDING_PCA_PATH)
+    return Path(settings.STORAGE_PATH) / "reduction" / f"pca_{dim}.npz"
+
+def vector_dim() -> int:
+    """Size of the vectors actually stored in the vector store"""
+    if settings.EMBEDDING_REDUCTION == "none":
+        return settings.EMBEDDING_DIM
+    return settings.EMBEDDING_REDUCED_DIM
+
+def fit_pca(vectors: np.ndarray, dim: int):
+    """Return (mean, components, explained variance ratio) of the top `dim` principal axes"""
+    mean = vectors.mean(axis=0)
+    centered = (vectors - mean).astype(np.float64)
+    # Eigendecomposition of the d x d covariance keeps memory independent of corpus size
+    eigenvalues, eigenvectors = np.linalg.eigh(centered.T @ centered)
+    order = np.argsort(eigenvalues)[::-1][:dim]
+    components = eigenvectors[:, order].T.astype(np.float32)
+    explained = eigenvalues[order] / eigenvalues.sum()
+    return mean.astype(np.float32), components, explained
+
+def save_pca(path: Path, mean: np.ndarray, components: np.ndarray):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(path, mean=mean, components=components)
+    logger.info(f"Saved PCA projection ({components.shape[1]} -> {components.shape[0]}) to {path}")
+
+class DimensionReducer:
+    """Optional projection between EmbeddingService output and the stored vectors"""
+
+    def __init__(self):
+        self.mode = settings.EMBEDDING_REDUCTION
+        self.dim = vector_dim()
+        self.mean = None
+        self.components = None
+
+        if self.mode == "pca":
+            path = pca_path(self.dim)
+            data = np.load(path)
+            self.mean = data["mean"]
+            self.components = data["components"]
+            if self.components.shape[0] != self.dim:
+                raise ValueError(
+                    f"PCA projection at {path} has {self.components.shape[0]} dims, "
+                    f"expected {self.dim}"
+                )
+            logger.info(f"Loaded PCA projection from {path}")
+        elif self.mode not in ("none", "truncate"):
+            raise ValueError(f"Unknown embedding reduction: {self.mode}")
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        """Project one vector or a matrix of row vectors"""
+        if self.mode == "none":
+            return vectors
+        if self.mode == "truncate":
+            # Matryoshka-style models keep most of the signal in the leading dims
+            return vectors[..., :self.dim]
+        return (vectors - self.mean) @ self.components.T
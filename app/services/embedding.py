@@ -1,32 +1,237 @@
-from transformers import AutoTokenizer, AutoModel
+from transformers import AutoTokenizer
 import torch
 import numpy as np
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import time
+from typing import List, Tuple
 from app.core.logging import logger
 from app.core.config import settings
+from app.core.metrics import metrics
+from .embedding_cache import EmbeddingCache
+from .embedding_backends import create_backend
 
 class EmbeddingService:
     def __init__(self):
         self.model_name = settings.EMBEDDING_MODEL
         self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        self.model = AutoModel.from_pretrained(self.model_name)
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.model.to(self.device)
-        logger.info(f"Initialized embedding model on {self.device}")
+        # The Rust tokenizer raises "Already borrowed" when two threads use it and
+        # one switches truncation settings, so chunking (default pool, no
+        # truncation) gets its own instance instead of sharing the inference one
+        self._chunk_tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        self._chunk_lock = threading.Lock()
+        if settings.EMBEDDING_INTRA_OP_THREADS > 0:
+            torch.set_num_threads(settings.EMBEDDING_INTRA_OP_THREADS)
+        self.backend = create_backend(settings.EMBEDDING_BACKEND, self.model_name, self.tokenizer)
+        self.device = self.backend.device
+        self.cache = EmbeddingCache(self.model_name, self.backend.name)
+
+        # Micro-batching: concurrent callers are queued and flushed together
+        self.max_batch_size = max(1, settings.EMBEDDING_MAX_BATCH_SIZE)
+        self.max_wait = settings.EMBEDDING_MAX_WAIT_MS / 1000
+        self.bulk_batch_size = max(1, settings.EMBEDDING_BULK_BATCH_SIZE)
+        self._pending = []
+        self._flush_handle = None
+        self._batch_tasks = set()
+
+        # Forward passes run on a dedicated pool, never on the event loop
+        self.executor_workers = max(1, settings.EMBEDDING_EXECUTOR_WORKERS)
+        self._executor = None
+        self._executor_pid = None
+        logger.info(f"Initialized {self.backend.name} embedding model on {self.device}")
 
     async def get_embedding(self, text: str) -> np.ndarray:
-        try:
-            inputs = self.tokenizer(
-                text,
-                padding=True,
-                truncation=True,
-                return_tensors="pt"
-            ).to(self.device)
+        cached = (await self.cache.get_many([text]))[0]
+        if cached is not None:
+            return cached
+
+        embedding = await self._enqueue(text)
+        await self.cache.set_many([text], embedding[None, :])
+        return embedding
+
+    async def _enqueue(self, text: str) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, time.perf_counter()))
+        metrics.set_gauge("embedding.pending", len(self._pending))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Hand the pending requests to one batched forward pass"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
 
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                embeddings = outputs.last_hidden_state[:, 0, :]
+        batch = self._pending[:self.max_batch_size]
+        self._pending = self._pending[self.max_batch_size:]
+        metrics.set_gauge("embedding.pending", len(self._pending))
+        if self._pending:
+            # Leftovers from an oversized burst go out on the next tick
+            self._flush_handle = asyncio.get_running_loop().call_soon(self._flush)
 
-            return embeddings.cpu().numpy()[0]
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch: list):
+        started = time.perf_counter()
+        for _, _, enqueued in batch:
+            metrics.observe("embedding.queue_wait_ms", (started - enqueued) * 1000)
+        metrics.observe("embedding.batch_size", len(batch))
+
+        try:
+            embeddings = await self._infer([text for text, _, _ in batch], self.max_batch_size)
         except Exception as e:
             logger.error(f"Error generating embedding: {e}")
-            raise
\ No newline at end of file
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        metrics.observe("embedding.batch_ms", (time.perf_counter() - started) * 1000)
+        for row, (_, future, _) in zip(embeddings, batch):
+            if not future.done():
+                future.set_result(row)
+
+    async def get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Embed many texts at once, returning one row per text in input order"""
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, settings.EMBEDDING_DIM), dtype=np.float32)
+
+        try:
+            cached = await self.cache.get_many(texts)
+            # Identical texts are embedded once
+            missing = list(dict.fromkeys(
+                text for text, vector in zip(texts, cached) if vector is None
+            ))
+            computed = {}
+            if missing:
+                embeddings = await self._infer(missing, self.bulk_batch_size)
+                await self.cache.set_many(missing, embeddings)
+                computed = dict(zip(missing, embeddings))
+
+            return np.stack([
+                vector if vector is not None else computed[text]
+                for text, vector in zip(texts, cached)
+            ])
+        except Exception as e:
+            logger.error(f"Error generating embeddings: {e}")
+            raise
+
+    async def warmup(self):
+        """Run one forward pass so the first real request does not pay for lazy init"""
+        await self._infer(["warmup"], 1)
+
+    def chunk_text(self, text: str) -> List[str]:
+        """Split text into overlapping token windows that fit the model"""
+        return self.chunk_texts([text])[0]
+
+    def chunk_texts(self, texts: List[str]) -> List[List[str]]:
+        """chunk_text for many documents, tokenized in one batched call"""
+        if not texts:
+            return []
+        with self._chunk_lock:
+            offsets = self._chunk_tokenizer(
+                list(texts),
+                add_special_tokens=False,
+                return_offsets_mapping=True
+            )["offset_mapping"]
+        return [self._split(text, text_offsets) for text, text_offsets in zip(texts, offsets)]
+
+    def _split(self, text: str, offsets: List[Tuple[int, int]]) -> List[str]:
+        window = min(settings.EMBEDDING_CHUNK_TOKENS, self._chunk_tokenizer.model_max_length - 2)
+        step = max(1, window - settings.EMBEDDING_CHUNK_OVERLAP)
+        if len(offsets) <= window:
+            return [text]
+
+        chunks = []
+        for start in range(0, len(offsets), step):
+            end = min(start + window, len(offsets))
+            chunks.append(text[offsets[start][0]:offsets[end - 1][1]])
+            if end == len(offsets):
+                break
+        return chunks
+
+    async def embed_document(self, text: str) -> Tuple[List[str], np.ndarray]:
+        """Chunk a long document and embed every chunk in bulk"""
+        chunks = await asyncio.to_thread(self.chunk_text, text or "")
+        return chunks, await self.get_embeddings(chunks)
+
+    async def embed_documents(self, texts: List[str]) -> List[np.ndarray]:
+        """Chunk many documents and embed all their chunks in one bulk pass"""
+        chunked = await asyncio.to_thread(self.chunk_texts, [text or "" for text in texts])
+        vectors = await self.get_embeddings([chunk for chunks in chunked for chunk in chunks])
+        bounds = np.cumsum([0] + [len(chunks) for chunks in chunked])
+        return [vectors[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Threads do not survive fork, so each process builds its own pool
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.executor_workers,
+                thread_name_prefix="embedding"
+            )
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    async def _infer(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """Run _encode on the inference pool and await the result"""
+        metrics.add_gauge("embedding.executor_queue_depth", 1)
+
+        def run():
+            metrics.add_gauge("embedding.executor_queue_depth", -1)
+            metrics.add_gauge("embedding.inflight", 1)
+            try:
+                return self._encode(texts, batch_size)
+            finally:
+                metrics.add_gauge("embedding.inflight", -1)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), run)
+
+    def _encode(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """Embed texts in length-sorted, padded batches and return the CLS vectors"""
+        if not texts:
+            return np.empty((0, settings.EMBEDDING_DIM), dtype=np.float32)
+
+        # Tokenize once without padding so inputs of similar length share a batch
+        encoded = self.tokenizer(texts, truncation=True)
+        lengths = [len(ids) for ids in encoded["input_ids"]]
+        order = sorted(range(len(texts)), key=lambda i: lengths[i])
+
+        result = None
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            features = [
+                {key: encoded[key][i] for key in encoded.keys()}
+                for i in indices
+            ]
+            inputs = self.tokenizer.pad(
+                features,
+                padding=True,
+                return_tensors="np"
+            )
+
+            rows = self.backend.encode(dict(inputs))
+            if result is None:
+                result = np.empty((len(texts), rows.shape[1]), dtype=rows.dtype)
+            result[indices] = rows
+
+            padded_tokens = len(indices) * max(lengths[i] for i in indices)
+            metrics.observe(
+                "embedding.padding_efficiency",
+                sum(lengths[i] for i in indices) / padded_tokens
+            )
+
+        return result
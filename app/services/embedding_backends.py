@@ -0,0 +1,119 @@
+from pathlib import Path
+from typing import Dict, List
+import numpy as np
+import torch
+from transformers import AutoModel
+from app.core.config import settings
+from app.core.logging import logger
+
+class TorchBackend:
+    """Full-precision PyTorch AutoModel"""
+    name = "torch"
+
+    def __init__(self, model_name: str):
+        self.model = AutoModel.from_pretrained(model_name)
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.model.to(self.device)
+
+    def encode(self, inputs: Dict[str, np.ndarray]) -> np.ndarray:
+        """Return the CLS vectors for a padded batch"""
+        tensors = {key: torch.from_numpy(value).to(self.device) for key, value in inputs.items()}
+        with torch.no_grad():
+            outputs = self.model(**tensors)
+            embeddings = outputs.last_hidden_state[:, 0, :]
+        return embeddings.cpu().numpy()
+
+class OnnxBackend:
+    """ONNX Runtime on CPU, optionally with dynamic int8 weight quantization"""
+
+    def __init__(self, model_name: str, tokenizer, quantize: bool = False):
+        import onnxruntime as ort
+
+        self.name = "onnx-int8" if quantize else "onnx"
+        self.device = "cpu"
+        path = self._ensure_model(model_name, tokenizer, quantize)
+
+        options = ort.SessionOptions()
+        if settings.EMBEDDING_INTRA_OP_THREADS > 0:
+            options.intra_op_num_threads = settings.EMBEDDING_INTRA_OP_THREADS
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            str(path),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {item.name for item in self.session.get_inputs()}
+        logger.info(f"Loaded ONNX embedding model from {path}")
+
+    def encode(self, inputs: Dict[str, np.ndarray]) -> np.ndarray:
+        """Return the CLS vectors for a padded batch"""
+        feeds = {
+            key: value.astype(np.int64)
+            for key, value in inputs.items()
+            if key in self.input_names
+        }
+        last_hidden_state = self.session.run(["last_hidden_state"], feeds)[0]
+        return last_hidden_state[:, 0, :]
+
+    @staticmethod
+    def _ensure_model(model_name: str, tokenizer, quantize: bool) -> Path:
+        """Load the exported model from disk, exporting/quantizing it on first use"""
+        if settings.EMBEDDING_ONNX_DIR:
+            model_dir = Path(settings.EMBEDDING_ONNX_DIR)
+        else:
+            model_dir = Path(settings.STORAGE_PATH) / "onnx" / model_name.replace("/", "__")
+        fp32_path = model_dir / "model.onnx"
+        int8_path = model_dir / "model.int8.onnx"
+
+        if not fp32_path.exists():
+            model_dir.mkdir(parents=True, exist_ok=True)
+            export_onnx(model_name, tokenizer, fp32_path)
+
+        if not quantize:
+            return fp32_path
+
+        if not int8_path.exists():
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+            logger.info(f"Quantized ONNX embedding model to {int8_path}")
+        return int8_path
+
+class _LastHiddenState(torch.nn.Module):
+    def __init__(self, model, input_names: List[str]):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *inputs):
+        return self.model(**dict(zip(self.input_names, inputs))).last_hidden_state
+
+def export_onnx(model_name: str, tokenizer, path: Path):
+    """Export EMBEDDING_MODEL to ONNX with dynamic batch and sequence axes"""
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+
+    dummy = tokenizer(["warmup text", "a second, longer warmup text"], padding=True, return_tensors="pt")
+    input_names = list(dummy.keys())
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            _LastHiddenState(model, input_names),
+            tuple(dummy[name] for name in input_names),
+            str(path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+    logger.info(f"Exported ONNX embedding model to {path}")
+
+def create_backend(name: str, model_name: str, tokenizer):
+    if name == "torch":
+        return TorchBackend(model_name)
+    if name == "onnx":
+        return OnnxBackend(model_name, tokenizer)
+    if name == "onnx-int8":
+        return OnnxBackend(model_name, tokenizer, quantize=True)
+    raise ValueError(f"Unknown embedding backend: {name}")
@@ -0,0 +1,125 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+import asyncio
+import hashlib
+import uuid
+import numpy as np
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import metrics
+
+class EmbeddingCache:
+    """Content-hash embedding cache: bounded in-process LRU plus optional Redis or disk tier"""
+
+    def __init__(self, model_name: str, backend_name: str):
+        self.model_name = model_name
+        # Persistent tiers outlive config changes, so vectors from another backend
+        # (onnx-int8 vs torch) or reduction setup must never be served
+        self.namespace = "\0".join([
+            model_name,
+            backend_name,
+            settings.EMBEDDING_REDUCTION,
+            str(settings.EMBEDDING_REDUCED_DIM)
+        ])
+        self.max_size = settings.EMBEDDING_CACHE_SIZE
+        self.backend = settings.EMBEDDING_CACHE_BACKEND
+        self.ttl = settings.EMBEDDING_CACHE_TTL
+        self._memory = OrderedDict()
+        self._redis = None
+        self._disk_path = None
+
+        if self.backend == "redis":
+            from redis import asyncio as aioredis
+            self._redis = aioredis.Redis.from_url(settings.REDIS_URL)
+        elif self.backend == "disk":
+            self._disk_path = Path(settings.STORAGE_PATH) / "embedding_cache"
+            self._disk_path.mkdir(parents=True, exist_ok=True)
+        elif self.backend != "memory":
+            raise ValueError(f"Unknown embedding cache backend: {self.backend}")
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{text}".encode("utf-8")).hexdigest()
+
+    async def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        keys = [self.key(text) for text in texts]
+        results = [self._memory_get(key) for key in keys]
+        metrics.incr("embedding_cache.memory_hits", sum(r is not None for r in results))
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing and self.backend != "memory":
+            try:
+                found = await self._persistent_get([keys[i] for i in missing])
+            except Exception as e:
+                logger.warning(f"Embedding cache lookup failed: {e}")
+                found = [None] * len(missing)
+            for i, vector in zip(missing, found):
+                if vector is not None:
+                    results[i] = vector
+                    self._memory_set(keys[i], vector)
+            metrics.incr("embedding_cache.persistent_hits", sum(v is not None for v in found))
+
+        metrics.incr("embedding_cache.misses", sum(r is None for r in results))
+        return results
+
+    async def set_many(self, texts: List[str], vectors: np.ndarray):
+        keys = [self.key(text) for text in texts]
+        for key, vector in zip(keys, vectors):
+            self._memory_set(key, vector)
+
+        if self.backend != "memory":
+            try:
+                await self._persistent_set(keys, vectors)
+            except Exception as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+
+    def _memory_get(self, key: str) -> Optional[np.ndarray]:
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+        return vector
+
+    def _memory_set(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+        metrics.set_gauge("embedding_cache.memory_entries", len(self._memory))
+
+    async def _persistent_get(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        if self._redis is not None:
+            values = await self._redis.mget([f"emb:{key}" for key in keys])
+            return [
+                np.frombuffer(value, dtype=np.float32) if value is not None else None
+                for value in values
+            ]
+        return await asyncio.to_thread(lambda: [self._disk_load(key) for key in keys])
+
+    async def _persistent_set(self, keys: List[str], vectors: np.ndarray):
+        if self._redis is not None:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for key, vector in zip(keys, vectors):
+                    pipe.set(f"emb:{key}", vector.astype(np.float32).tobytes(), ex=self.ttl)
+                await pipe.execute()
+            return
+        await asyncio.to_thread(
+            lambda: [self._disk_store(key, vector) for key, vector in zip(keys, vectors)]
+        )
+
+    def _disk_file(self, key: str) -> Path:
+        return self._disk_path / key[:2] / f"{key}.npy"
+
+    def _disk_load(self, key: str) -> Optional[np.ndarray]:
+        path = self._disk_file(key)
+        if not path.exists():
+            return None
+        return np.load(path)
+
+    def _disk_store(self, key: str, vector: np.ndarray):
+        path = self._disk_file(key)
+        path.parent.mkdir(exist_ok=True)
+        # Write then rename so concurrent readers never see a partial file
+        tmp_path = path.with_name(f"{key}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, vector.astype(np.float32))
+        tmp_path.replace(path)
@@ -1,144 +1,393 @@
 
 from ..function_registry import FunctionRegistry
-from ..vector_store import VectorStore
-from ..embedding import EmbeddingService
-from typing import List, Optional, Dict, Any
+from ..container import services
+from ..hybrid_search import lexical_search, reciprocal_rank_fusion
+from typing import List, Optional, Tuple
 from uuid import UUID
-from app.core.database import SessionLocal
-from app.models import Article
+from datetime import datetime
+import asyncio
+import base64
+import json
+import time
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
+from app.core.config import settings
+from app.core.database import session_scope
+from app.core.permission import get_owned_article
+from app.models import Article, IndexOutbox
 from app.core.logging import logger
+from app.core.metrics import metrics
 from app.core.exceptions import ArticleNotFoundError, ValidationError
 from app.models import User
 
-vector_store = VectorStore()
-embedding_service = EmbeddingService()
+def article_payload(article: Article) -> dict:
+    """Qdrant payload for an article; the filterable fields are payload-indexed"""
+    return {
+        "title": article.title,
+        "snippet": (article.content_text or "")[:200],
+        "user_id": str(article.user_id),
+        "username": article.username,
+        "created_at": article.created_at.isoformat(),
+        "tags": (article.article_metadata or {}).get("tags", [])
+    }
 
 async def check_article_consistency(article_id: UUID) -> None:
-    """Check if article exists in both PostgreSQL and Qdrant"""
-    db = SessionLocal()
-    try:
-        pg_article = db.query(Article).filter(Article.id == article_id).first()
+    """Check if article exists in both PostgreSQL and Qdrant, repairing whichever side is off.
+
+    For a full sweep use scripts/reconcile_vectors.py.
+    """
+    vector_store = await services.get_vector_store()
+    embedding_service = await services.get_embedding_service()
+    async with session_scope() as db:
+        pg_article = await db.get(Article, article_id)
+    indexed = await vector_store.has_article(str(article_id))
+
+    if pg_article and not indexed:
+        _, embeddings = await embedding_service.embed_document(pg_article.content_text)
+        await vector_store.add_article(str(article_id), embeddings, article_payload(pg_article))
+    elif not pg_article and indexed:
+        await vector_store.delete_article(str(article_id))
+
+async def _index_after_commit(outbox_id, wait_for_index: bool):
+    """Wake the outbox indexer, optionally waiting until it has applied the change"""
+    indexer = await services.get_indexer()
+    search_cache = await services.get_search_cache()
+    # Postgres already changed, so lexical results are stale even before indexing
+    await search_cache.invalidate()
+    if wait_for_index:
+        if not await indexer.wait_for(outbox_id):
+            logger.warning(f"Article change {outbox_id} committed but not yet indexed")
+    else:
+        indexer.notify()
+
+async def create_article(
+    json_data: dict,
+    user_id: UUID,
+    wait_for_index: bool = False,
+    db: Optional[AsyncSession] = None
+) -> Article:
+    parsed_data = await parse_json_post(json_data)
+    
+    async with session_scope(db) as db:
         try:
-            await vector_store.get_article(str(article_id))
-            qdrant_exists = True
-        except:
-            qdrant_exists = False
-
-        if pg_article and not qdrant_exists:
-            embedding = await embedding_service.get_embedding(pg_article.content["text"])
-            await vector_store.add_article(
-                str(article_id),
-                embedding,
-                {
-                    "title": pg_article.title,
-                    "snippet": pg_article.content["text"][:200]
-                }
+            # added to put username in article
+            # (no query when the request's session already loaded the user during authentication)
+            user = await db.get(User, user_id)
+            article = Article(
+                user_id=user_id,
+                title=parsed_data["title"],
+                # added to put username in article
+                username=user.username,
+                content_text=parsed_data["content_text"],
+                content_json=parsed_data["content_json"]
             )
-        elif not pg_article and qdrant_exists:
-            await vector_store.delete_article(str(article_id))
-    finally:
-        db.close()
+            db.add(article)
+            await db.flush()
+            # Indexed asynchronously by the outbox indexer, committed together with the article
+            outbox = IndexOutbox(article_id=article.id, operation="upsert")
+            db.add(outbox)
+            await db.flush()
+            outbox_id = outbox.id
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error creating article: {e}")
+            raise
+
+    await _index_after_commit(outbox_id, wait_for_index)
+    return article
 
-async def create_article(json_data: dict, user_id: UUID) -> Article:
+async def update_article(
+    article_id: UUID,
+    json_data: dict,
+    user_id: UUID,
+    wait_for_index: bool = False,
+    db: Optional[AsyncSession] = None
+) -> Article:
     parsed_data = await parse_json_post(json_data)
     
-    db = SessionLocal()
+    async with session_scope(db) as db:
+        try:
+            # Ownership is checked by the fetch; the row lock orders concurrent edits and their outbox rows
+            article = await get_owned_article(db, article_id, user_id, for_update=True)
+
+            article.title = parsed_data["title"]
+            article.content_text = parsed_data["content_text"]
+            article.content_json = parsed_data["content_json"]
+            outbox = IndexOutbox(article_id=article.id, operation="upsert")
+            db.add(outbox)
+            await db.flush()
+            outbox_id = outbox.id
+
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error updating article: {e}")
+            raise
+
+    await _index_after_commit(outbox_id, wait_for_index)
+    return article
+
+async def delete_article(
+    article_id: UUID,
+    user_id: UUID,
+    wait_for_index: bool = False,
+    db: Optional[AsyncSession] = None
+):
+    async with session_scope(db) as db:
+        try:
+            article = await get_owned_article(db, article_id, user_id, for_update=True)
+
+            await db.delete(article)
+            outbox = IndexOutbox(article_id=article_id, operation="delete")
+            db.add(outbox)
+            await db.flush()
+            outbox_id = outbox.id
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error deleting article: {e}")
+            raise
+
+    await _index_after_commit(outbox_id, wait_for_index)
+    return {"message": "Article deleted successfully"}
+
+
+def encode_cursor(offset: int, generation: Optional[int] = None) -> str:
+    position = {"offset": offset, "generation": generation}
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[int, Optional[int]]:
+    """(offset, corpus generation the previous page was ranked against)"""
     try:
-        # added to put username in article
-        user = db.query(User).filter(User.id == user_id).first()
-        article = Article(
-            user_id=user_id,
-            title=parsed_data["title"],
-            # added to put username in article
-            username=user.username,
-            content_text=parsed_data["content_text"],
-            content_json=parsed_data["content_json"]
-        )
-        db.add(article)
-        db.commit()
-        db.refresh(article)
-
-        # Create vector embedding
-        embedding = await embedding_service.get_embedding(parsed_data["content_text"])
-        await vector_store.add_article(
-            str(article.id),
-            embedding,
-            {
-                "title": parsed_data["title"],
-                "snippet": parsed_data["content_text"][:200]
-            }
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        offset, generation = position["offset"], position.get("generation")
+    except Exception:
+        raise ValidationError("Invalid search cursor")
+    # bool is an int subclass; floats and strings would be silently truncated or parsed
+    if type(offset) is not int or offset < 0:
+        raise ValidationError("Invalid search cursor")
+    if generation is not None and type(generation) is not int:
+        raise ValidationError("Invalid search cursor")
+    return offset, generation
+
+def encode_list_cursor(article: Article) -> str:
+    position = {"created_at": article.created_at.isoformat(), "id": str(article.id)}
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+def decode_list_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(position["created_at"]), UUID(position["id"])
+    except Exception:
+        raise ValidationError("Invalid list cursor")
+
+def list_statement(
+    limit: int = 20,
+    user_id: Optional[UUID] = None,
+    username: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_content: bool = False
+) -> Select:
+    """One page of list_articles, plus one extra row that tells whether a next page exists"""
+    statement = select(Article)
+    if user_id:
+        statement = statement.where(Article.user_id == user_id)
+    if username:
+        statement = statement.where(Article.username == username)
+    if cursor:
+        created_at, article_id = decode_list_cursor(cursor)
+        statement = statement.where(tuple_(Article.created_at, Article.id) < tuple_(created_at, article_id))
+    if not include_content:
+        statement = statement.options(
+            defer(Article.content_text, raiseload=True),
+            defer(Article.content_json, raiseload=True)
         )
+    return statement.order_by(Article.created_at.desc(), Article.id.desc()).limit(limit + 1)
 
-        return article
+async def list_articles(
+    limit: int = 20,
+    user_id: Optional[UUID] = None,
+    username: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_content: bool = False,
+    db: Optional[AsyncSession] = None
+) -> Tuple[List[Article], Optional[str]]:
+    """Newest articles first, one page at a time, plus the cursor of the next page.
+
+    Pages are keyed on (created_at, id) rather than an offset, so each one is
+    a range scan of a composite index that starts where the last page ended.
+    Without `include_content` the content columns are never read; touching
+    them on the returned articles raises instead of lazy loading.
+    """
+    statement = list_statement(limit, user_id, username, cursor, include_content)
+
+    try:
+        async with session_scope(db) as db:
+            articles = list((await db.scalars(statement)).all())
     except Exception as e:
-        db.rollback()
-        logger.error(f"Error creating article: {e}")
+        logger.error(f"Error listing articles: {e}")
         raise
-    finally:
-        db.close()
 
-async def update_article(article_id: UUID, json_data: dict, user_id: UUID) -> Article:
-    parsed_data = await parse_json_post(json_data)
-    
-    db = SessionLocal()
-    try:
-        article = db.query(Article).filter(
-            Article.id == article_id,
-            Article.user_id == user_id
-        ).first()
-        
-        if not article:
-            raise ArticleNotFoundError(str(article_id))
+    next_cursor = encode_list_cursor(articles[limit - 1]) if len(articles) > limit else None
+    return articles[:limit], next_cursor
 
-        article.title = parsed_data["title"]
-        article.content_text = parsed_data["content_text"]
-        article.content_json = parsed_data["content_json"]
-
-        db.commit()
-        db.refresh(article)
-
-        # Update vector embedding
-        embedding = await embedding_service.get_embedding(parsed_data["content_text"])
-        await vector_store.add_article(
-            str(article.id),
-            embedding,
-            {
-                "title": parsed_data["title"],
-                "snippet": parsed_data["content_text"][:200]
-            }
+async def _vector_search(
+    query: str,
+    limit: int,
+    filters: dict,
+    two_stage: bool = False,
+    score_threshold: Optional[float] = None
+):
+    vector_store = await services.get_vector_store()
+    embedding_service = await services.get_embedding_service()
+    started = time.perf_counter()
+    query_embedding = await embedding_service.get_embedding(query)
+    if two_stage:
+        results = await _two_stage_search(vector_store, query, query_embedding, limit, filters, score_threshold)
+    else:
+        results = await vector_store.search_articles(
+            query_embedding, limit, filters, score_threshold=score_threshold
         )
+    metrics.observe("search.vector_ms", (time.perf_counter() - started) * 1000)
+    return results
 
-        return article
+async def _two_stage_search(
+    vector_store,
+    query: str,
+    query_embedding,
+    limit: int,
+    filters: dict,
+    score_threshold: Optional[float] = None
+):
+    """Wide quantized ANN prefetch and exact rescoring (both server-side), then an optional cross-encoder"""
+    started = time.perf_counter()
+    rerank_top_n = max(limit, settings.SEARCH_RERANK_TOP_N) if settings.SEARCH_RERANKER_MODEL else limit
+    results = await vector_store.two_stage_search(
+        query_embedding,
+        rerank_top_n,
+        filters,
+        prefetch_limit=max(settings.SEARCH_PREFETCH_LIMIT, limit * 4),
+        score_threshold=score_threshold
+    )
+    rescored = time.perf_counter()
+    # Prefetch and rescore are one server-side query, so they can only be timed
+    # together; the cross-encoder below is the one stage timed on its own
+    metrics.observe("search.stage1_2_ann_rescore_ms", (rescored - started) * 1000)
+
+    if settings.SEARCH_RERANKER_MODEL and results:
+        reranker = await services.get_reranker()
+        results = await asyncio.to_thread(reranker.rerank, query, results, limit)
+        metrics.observe("search.stage2_cross_encoder_ms", (time.perf_counter() - rescored) * 1000)
+    return results
+
+async def _lexical_search(query: str, limit: int, filters: dict):
+    started = time.perf_counter()
+    try:
+        results = await lexical_search(query, limit, filters)
     except Exception as e:
-        db.rollback()
-        logger.error(f"Error updating article: {e}")
-        raise
-    finally:
-        db.close()
+        # Fall back to the vector ranking alone rather than failing the search
+        logger.error(f"Lexical search failed, using vector results only: {e}")
+        metrics.incr("search.lexical_errors")
+        return []
+    metrics.observe("search.lexical_ms", (time.perf_counter() - started) * 1000)
+    return results
+
+async def _ranked_search(
+    query: str,
+    depth: int,
+    filters: dict,
+    mode: str,
+    two_stage: bool,
+    score_threshold: Optional[float]
+) -> List[dict]:
+    """The top `depth` results, best first"""
+    if mode == "hybrid":
+        candidates = max(depth, settings.SEARCH_HYBRID_CANDIDATES)
+        # Both legs run concurrently, so hybrid costs max(vector, lexical) latency
+        vector_results, lexical_results = await asyncio.gather(
+            _vector_search(query, candidates, filters, two_stage, score_threshold),
+            _lexical_search(query, candidates, filters)
+        )
+        results = reciprocal_rank_fusion(
+            [vector_results, lexical_results],
+            settings.SEARCH_RRF_K
+        )[:depth]
+    else:
+        results = await _vector_search(query, depth, filters, two_stage, score_threshold)
+
+    return [
+        {
+            "id": result.id,
+            "title": result.payload.get("title"),
+            "snippet": result.payload.get("snippet"),
+            "score": result.score
+        }
+        for result in results
+    ]
+
+async def search_articles_page(
+    query: str,
+    limit: int = 10,
+    user_id: Optional[UUID] = None,
+    username: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    tags: Optional[List[str]] = None,
+    mode: Optional[str] = None,
+    two_stage: Optional[bool] = None,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    score_threshold: Optional[float] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """One page of search results plus the cursor of the next page (None on the last one).
 
-async def delete_article(article_id: UUID, user_id: UUID):
-    db = SessionLocal()
+    The ranked list is fetched in windows of SEARCH_PAGE_WINDOW results and
+    cached, so paging within a window never searches again and each new
+    window costs one deeper query instead of one per page. Cursors carry the
+    corpus generation they were ranked against; after an article write the
+    ranking shifts, so an older cursor is rejected rather than silently
+    skipping or repeating results.
+    """
     try:
-        article = db.query(Article).filter(
-            Article.id == article_id,
-            Article.user_id == user_id
-        ).first()
-        
-        if not article:
-            raise ArticleNotFoundError(str(article_id))
+        mode = mode or settings.SEARCH_MODE
+        two_stage = settings.SEARCH_TWO_STAGE if two_stage is None else two_stage
+        search_cache = await services.get_search_cache()
+        generation = await search_cache.generation()
+        if cursor:
+            offset, cursor_generation = decode_cursor(cursor)
+            if None not in (cursor_generation, generation) and cursor_generation != generation:
+                raise ValidationError("Search results changed since the previous page; search again without a cursor")
+        end = offset + limit
+        if end > settings.SEARCH_MAX_DEPTH:
+            raise ValidationError(f"Search results are only available up to position {settings.SEARCH_MAX_DEPTH}")
+        filters = {
+            "user_id": user_id,
+            "username": username,
+            "created_after": created_after,
+            "created_before": created_before,
+            "tags": tags
+        }
+        # One extra result tells whether a next page exists
+        window = max(1, settings.SEARCH_PAGE_WINDOW)
+        depth = min(-(-(end + 1) // window) * window, settings.SEARCH_MAX_DEPTH)
 
-        db.delete(article)
-        db.commit()
-        await vector_store.delete_article(str(article_id))
-        
-        return {"message": "Article deleted successfully"}
+        cache_key, ranked = await search_cache.get(query, depth, {
+            "mode": mode,
+            "two_stage": two_stage,
+            "score_threshold": score_threshold,
+            "filters": filters
+        }, generation)
+        if ranked is None:
+            ranked = await _ranked_search(query, depth, filters, mode, two_stage, score_threshold)
+            await search_cache.set(cache_key, ranked)
+
+        next_cursor = encode_cursor(end, generation) if len(ranked) > end else None
+        return ranked[offset:end], next_cursor
     except Exception as e:
-        db.rollback()
-        logger.error(f"Error deleting article: {e}")
+        logger.error(f"Error searching articles: {e}")
         raise
-    finally:
-        db.close()
-
 
 @FunctionRegistry.register(
     name="search_articles",
@@ -156,28 +405,91 @@ async def delete_article(article_id: UUID, user_id: UUID):
                 "default": 10,
                 "minimum": 1,
                 "maximum": 100
+            },
+            "user_id": {
+                "type": "string",
+                "description": "Only return articles written by this user",
+                "format": "uuid"
+            },
+            "username": {
+                "type": "string",
+                "description": "Only return articles written by this username"
+            },
+            "created_after": {
+                "type": "string",
+                "description": "Only return articles created at or after this time",
+                "format": "date-time"
+            },
+            "created_before": {
+                "type": "string",
+                "description": "Only return articles created at or before this time",
+                "format": "date-time"
+            },
+            "tags": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Only return articles with at least one of these tags"
+            },
+            "mode": {
+                "type": "string",
+                "enum": ["vector", "hybrid"],
+                "description": "Dense-only search, or dense + keyword search fused by rank"
+            },
+            "two_stage": {
+                "type": "boolean",
+                "description": "Prefetch a wide candidate set and rerank it exactly (slower, more precise)"
+            },
+            "offset": {
+                "type": "integer",
+                "description": "Number of results to skip, for fetching further pages",
+                "default": 0,
+                "minimum": 0
+            },
+            "score_threshold": {
+                "type": "number",
+                "description": "Minimum vector similarity of returned results"
             }
         },
         "required": ["query"]
     }
 )
-async def search_articles(query: str, limit: int = 10) -> List[dict]:
+async def search_articles(
+    query: str,
+    limit: int = 10,
+    user_id: Optional[UUID] = None,
+    username: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    tags: Optional[List[str]] = None,
+    mode: Optional[str] = None,
+    two_stage: Optional[bool] = None,
+    offset: int = 0,
+    score_threshold: Optional[float] = None
+) -> List[dict]:
+    # Function calls pass the JSON arguments through as strings
     try:
-        query_embedding = await embedding_service.get_embedding(query)
-        results = await vector_store.search_articles(query_embedding, limit)
-        
-        return [
-            {
-                "id": result.id,
-                "title": result.payload.get("title"),
-                "snippet": result.payload.get("snippet"),
-                "score": result.score
-            }
-            for result in results
-        ]
-    except Exception as e:
-        logger.error(f"Error searching articles: {e}")
-        raise
+        if isinstance(user_id, str):
+            user_id = UUID(user_id)
+        if isinstance(created_after, str):
+            created_after = datetime.fromisoformat(created_after)
+        if isinstance(created_before, str):
+            created_before = datetime.fromisoformat(created_before)
+    except ValueError as e:
+        raise ValidationError(f"Invalid search filter: {e}")
+    results, _ = await search_articles_page(
+        query,
+        limit,
+        user_id=user_id,
+        username=username,
+        created_after=created_after,
+        created_before=created_before,
+        tags=tags,
+        mode=mode,
+        two_stage=two_stage,
+        offset=offset,
+        score_threshold=score_threshold
+    )
+    return results
 
 
 @FunctionRegistry.register(
@@ -195,17 +507,14 @@ async def search_articles(query: str, limit: int = 10) -> List[dict]:
         "required": ["article_id"]
     }
 )
-async def get_article(article_id: UUID) -> Article:
-    db = SessionLocal()
-    try:
-        article = db.query(Article).filter(Article.id == article_id).first()
+async def get_article(article_id: UUID, db: Optional[AsyncSession] = None) -> Article:
+    async with session_scope(db) as db:
+        article = await db.get(Article, article_id)
         if not article:
             raise ArticleNotFoundError(str(article_id))
         
         # await check_article_consistency(article_id)
         return article
-    finally:
-        db.close()
     
 #     return article
 async def parse_json_post(post_data: dict) -> dict:
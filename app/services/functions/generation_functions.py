@@ -1,10 +1,8 @@
 
 from ..function_registry import FunctionRegistry
-from ..generation import GenerationService
+from ..container import services
 from app.core.logging import logger
 
-generation_service = GenerationService()
-
 @FunctionRegistry.register(
     name="generate_image",
     description="Generate an image based on text description",
@@ -22,6 +20,7 @@ generation_service = GenerationService()
 async def generate_image(prompt: str):
     try:
         logger.info(f"Generating image with prompt: {prompt}")
+        generation_service = await services.get_generation_service()
         task_id = await generation_service.create_image_task(prompt)
         logger.info(f"Created task with ID: {task_id}")
         return {
@@ -49,6 +48,7 @@ async def generate_image(prompt: str):
 async def check_generation_status(task_id: str):
     try:
         logger.info(f"Checking status for task: {task_id}")
+        generation_service = await services.get_generation_service()
         status = await generation_service.get_task_status(task_id)
         if not status:
             return {"message": "Task not found"}
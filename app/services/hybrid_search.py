@@ -0,0 +1,77 @@
+from typing import Dict, List, Optional
+from sqlalchemy import Select, Text, func, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import array
+from app.core.database import AsyncSessionLocal
+from app.models import Article
+from app.models.article import article_tsvector
+from .vector_store import ArticleHit
+
+def _apply_filters(query, filters: Optional[dict]):
+    """SQL equivalent of vector_store.build_filter"""
+    if not filters:
+        return query
+    if filters.get("user_id"):
+        query = query.filter(Article.user_id == filters["user_id"])
+    if filters.get("username"):
+        query = query.filter(Article.username == filters["username"])
+    if filters.get("created_after"):
+        query = query.filter(Article.created_at >= filters["created_after"])
+    if filters.get("created_before"):
+        query = query.filter(Article.created_at <= filters["created_before"])
+    if filters.get("tags"):
+        query = query.filter(Article.article_metadata["tags"].has_any(array(filters["tags"], type_=Text)))
+    return query
+
+def lexical_statement(query: str, limit: int = 10, filters: Optional[dict] = None) -> Select:
+    """Rank articles by full-text and trigram match on title and content_text.
+
+    Full-text covers whole-word queries. Trigram similarity covers exact
+    titles, names and Korean keywords, which the "simple" tsvector config
+    does not split into words. Every predicate is served by a GIN index
+    (checked by scripts/provision_db.py).
+    """
+    tsquery = func.websearch_to_tsquery(literal_column("'simple'::regconfig"), query)
+    tsvector = article_tsvector()
+    score = (
+        func.ts_rank_cd(tsvector, tsquery)
+        + func.similarity(Article.title, query)
+        + func.word_similarity(query, func.coalesce(Article.content_text, literal_column("''")))
+    ).label("score")
+
+    return _apply_filters(
+        select(
+            Article.id,
+            Article.title,
+            func.substr(Article.content_text, 1, 200).label("snippet"),
+            score
+        ).filter(or_(
+            tsvector.op("@@")(tsquery),
+            Article.title.op("%")(query),
+            Article.content_text.op("%>")(query)
+        )),
+        filters
+    ).order_by(score.desc()).limit(limit)
+
+async def lexical_search(query: str, limit: int = 10, filters: Optional[dict] = None) -> List[ArticleHit]:
+    statement = lexical_statement(query, limit, filters)
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(statement)).all()
+
+    return [
+        ArticleHit(
+            id=str(row.id),
+            score=float(row.score),
+            payload={"title": row.title, "snippet": row.snippet or ""}
+        )
+        for row in rows
+    ]
+
+def reciprocal_rank_fusion(rankings: List[List[ArticleHit]], k: int = 60) -> List[ArticleHit]:
+    """Fuse ranked lists by summing 1 / (k + rank); earlier lists win payload ties"""
+    fused: Dict[str, ArticleHit] = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, start=1):
+            if hit.id not in fused:
+                fused[hit.id] = ArticleHit(id=hit.id, score=0.0, payload=hit.payload)
+            fused[hit.id].score += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda hit: hit.score, reverse=True)
@@ -0,0 +1,336 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+import asyncio
+import time
+from sqlalchemy import func, literal_column, or_, update
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.logging import logger
+from app.core.metrics import metrics
+from app.models import Article, IndexOutbox
+from .functions.article_functions import article_payload
+
+# pg advisory lock key held by whichever process is draining the outbox
+DRAIN_LOCK_KEY = 0x1D5E0B0C
+
+class OutboxIndexer:
+    """Background worker that applies index_outbox rows to the vector store.
+
+    Rows are claimed in batches with FOR UPDATE SKIP LOCKED. An advisory lock
+    keeps a single drainer across workers, so writes for one article are
+    applied in commit order. Each batch is coalesced per article, embedded in
+    one bulk pass and written through the VectorWriter with durable=True. Rows
+    are marked processed in the same transaction. A failed batch is rolled
+    back and its rows retried one by one, so only the rows that fail on their
+    own are charged an attempt. Those back off exponentially; after
+    INDEXER_MAX_ATTEMPTS they are logged as dead and kept until re-driven
+    (redrive_dead_rows / scripts/run_indexer.py --redrive).
+    """
+
+    def __init__(self, embedding_service, vector_writer):
+        self.embedding_service = embedding_service
+        self.vector_writer = vector_writer
+        self.batch_size = max(1, settings.INDEXER_BATCH_SIZE)
+        self.interval = settings.INDEXER_POLL_INTERVAL_MS / 1000
+        self.max_attempts = settings.INDEXER_MAX_ATTEMPTS
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self._pruned_at = 0.0
+        # Futures of wait_for callers per outbox id, resolved when this process
+        # finishes the row; recent outcomes cover rows finished before the wait
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        self._recent: "OrderedDict[str, bool]" = OrderedDict()
+        # Whether this process held the drain lock on its last attempt
+        self._draining = False
+
+    def start(self):
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+            logger.info("Started outbox indexer")
+
+    def notify(self):
+        """Drain now instead of at the next poll"""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def close(self):
+        self._closed = True
+        if self._task is not None:
+            self._wake.set()
+            await self._task
+            self._task = None
+
+    async def wait_for(self, outbox_id, timeout: Optional[float] = None) -> bool:
+        """Wait until an outbox row has been applied; False on timeout or when it gave up.
+
+        Rows drained by this process resolve the wait directly. Postgres is only
+        polled, with backoff, while another process holds the drain lock.
+        """
+        key = str(outbox_id)
+        if key in self._recent:
+            return self._recent[key]
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, []).append(future)
+        self.notify()
+        deadline = time.monotonic() + (timeout or settings.INDEXER_WAIT_TIMEOUT)
+        delay = 0.05
+        try:
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    return await asyncio.wait_for(asyncio.shield(future), min(delay, remaining))
+                except asyncio.TimeoutError:
+                    pass
+                delay = min(delay * 2, 1.0)
+                if not self._draining:
+                    state = await asyncio.to_thread(_row_state, outbox_id)
+                    if state != "pending":
+                        return state == "done"
+            # Drain lock ownership can move between batches; check once before giving up
+            state = await asyncio.to_thread(_row_state, outbox_id)
+            if state != "pending":
+                return state == "done"
+            logger.warning(f"Timed out waiting for outbox row {outbox_id} to be indexed")
+            return False
+        finally:
+            waiters = self._waiters.get(key, [])
+            if future in waiters:
+                waiters.remove(future)
+            if not waiters:
+                self._waiters.pop(key, None)
+
+    def _resolve(self, row_ids: Iterable, indexed: bool):
+        for row_id in row_ids:
+            key = str(row_id)
+            self._recent[key] = indexed
+            for future in self._waiters.pop(key, []):
+                if not future.done():
+                    future.set_result(indexed)
+        while len(self._recent) > 10000:
+            self._recent.popitem(last=False)
+
+    async def _run(self):
+        while not self._closed:
+            try:
+                drained = await self.drain_batch()
+            except Exception as e:
+                logger.error(f"Outbox indexer error: {e}")
+                drained = 0
+            if drained:
+                continue
+            if time.monotonic() - self._pruned_at > 3600:
+                self._pruned_at = time.monotonic()
+                try:
+                    await asyncio.to_thread(_prune_processed)
+                    dead = await asyncio.to_thread(_count_dead_rows)
+                    metrics.set_gauge("indexer.dead_rows", dead)
+                    if dead:
+                        logger.warning(f"{dead} outbox rows gave up; re-drive them with scripts/run_indexer.py --redrive")
+                except Exception as e:
+                    logger.error(f"Outbox prune failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def drain_batch(self) -> int:
+        """Apply one batch of pending rows; returns how many were processed"""
+        db = SessionLocal()
+        try:
+            rows = await asyncio.to_thread(self._claim, db)
+            self._draining = rows is not None
+            if not rows:
+                await asyncio.to_thread(db.rollback)
+                return 0
+
+            started = time.perf_counter()
+            try:
+                await self._apply(db, rows)
+            except Exception as e:
+                row_ids = [row.id for row in rows]
+                await asyncio.to_thread(db.rollback)
+                if len(row_ids) == 1:
+                    await self._fail(row_ids, e)
+                    return 0
+                # Find the rows that fail on their own instead of charging the whole batch
+                logger.warning(f"Batch of {len(row_ids)} outbox rows failed ({e}); retrying them one by one")
+                processed = 0
+                for row_id in row_ids:
+                    processed += await self._drain_row(row_id)
+                return processed
+
+            await self._finish(db, rows, started)
+            return len(rows)
+        finally:
+            await asyncio.to_thread(db.close)
+
+    async def _drain_row(self, row_id) -> int:
+        db = SessionLocal()
+        try:
+            rows = await asyncio.to_thread(self._claim, db, [row_id])
+            if not rows:
+                await asyncio.to_thread(db.rollback)
+                return 0
+            started = time.perf_counter()
+            try:
+                await self._apply(db, rows)
+            except Exception as e:
+                await asyncio.to_thread(db.rollback)
+                await self._fail([row_id], e)
+                return 0
+            await self._finish(db, rows, started)
+            return 1
+        finally:
+            await asyncio.to_thread(db.close)
+
+    async def _finish(self, db, rows: List[IndexOutbox], started: float):
+        processed_at = datetime.now(timezone.utc)
+        # Read before commit expires the rows
+        row_ids = [row.id for row in rows]
+        for row in rows:
+            row.processed_at = processed_at
+        await asyncio.to_thread(db.commit)
+        self._resolve(row_ids, True)
+        metrics.incr("indexer.processed_rows", len(rows))
+        metrics.observe("indexer.batch_ms", (time.perf_counter() - started) * 1000)
+
+    async def _fail(self, row_ids: list, error: Exception):
+        dead = await asyncio.to_thread(_record_failure, row_ids, str(error))
+        self._resolve(dead, False)
+        metrics.incr("indexer.failed_rows", len(row_ids))
+        logger.error(f"Error indexing {len(row_ids)} outbox rows: {error}")
+
+    def _claim(self, db, row_ids: Optional[list] = None) -> Optional[List[IndexOutbox]]:
+        """Lock and return pending rows; None when another process holds the drain lock"""
+        if not db.query(func.pg_try_advisory_xact_lock(DRAIN_LOCK_KEY)).scalar():
+            return None
+        query = db.query(IndexOutbox).filter(
+            IndexOutbox.processed_at.is_(None),
+            IndexOutbox.attempts < self.max_attempts,
+            or_(IndexOutbox.next_attempt_at.is_(None), IndexOutbox.next_attempt_at <= func.now())
+        )
+        if row_ids is not None:
+            query = query.filter(IndexOutbox.id.in_(row_ids))
+        return (
+            query
+            .order_by(IndexOutbox.created_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+    async def _apply(self, db, rows: List[IndexOutbox]):
+        # Only the latest operation per article matters
+        operations: Dict[str, str] = {}
+        for row in rows:
+            operations[str(row.article_id)] = row.operation
+
+        upsert_ids = [article_id for article_id, operation in operations.items() if operation == "upsert"]
+        articles = await asyncio.to_thread(
+            lambda: db.query(Article).filter(Article.id.in_(upsert_ids)).all() if upsert_ids else []
+        )
+        # Articles deleted since their upsert was queued are removed instead
+        delete_ids = set(operations) - {str(article.id) for article in articles}
+
+        embeddings = await self.embedding_service.embed_documents([article.content_text for article in articles])
+        await asyncio.gather(
+            *(
+                self.vector_writer.upsert(str(article.id), vectors, article_payload(article), durable=True)
+                for article, vectors in zip(articles, embeddings)
+                if len(vectors)
+            ),
+            *(self.vector_writer.delete(article_id, durable=True) for article_id in delete_ids)
+        )
+
+def check_outbox_schema():
+    """Fail readiness when index_outbox is missing or predates this code"""
+    db = SessionLocal()
+    try:
+        db.query(IndexOutbox).limit(0).all()
+    except Exception as e:
+        raise RuntimeError(f"index_outbox is missing or outdated, run scripts/provision_db.py: {e}")
+    finally:
+        db.close()
+
+def _row_state(outbox_id) -> str:
+    db = SessionLocal()
+    try:
+        row = db.query(IndexOutbox.processed_at, IndexOutbox.attempts).filter(IndexOutbox.id == outbox_id).first()
+        if row is None or row.processed_at is not None:
+            return "done"
+        return "failed" if row.attempts >= settings.INDEXER_MAX_ATTEMPTS else "pending"
+    finally:
+        db.close()
+
+def _prune_processed():
+    """Drop processed rows older than INDEXER_RETENTION_HOURS"""
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.INDEXER_RETENTION_HOURS)
+    db = SessionLocal()
+    try:
+        deleted = db.query(IndexOutbox).filter(IndexOutbox.processed_at < cutoff).delete(synchronize_session=False)
+        db.commit()
+        if deleted:
+            logger.info(f"Pruned {deleted} processed outbox rows")
+    finally:
+        db.close()
+
+def _record_failure(row_ids: list, error: str) -> list:
+    """Charge the rows an attempt and schedule their retry base * 2^attempts seconds out.
+
+    Returns the ids of rows that have now run out of attempts.
+    """
+    delay = func.least(
+        settings.INDEXER_RETRY_BASE_SECONDS * func.power(2, IndexOutbox.attempts),
+        settings.INDEXER_RETRY_MAX_SECONDS
+    )
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            update(IndexOutbox)
+            .where(IndexOutbox.id.in_(row_ids))
+            .values(
+                attempts=IndexOutbox.attempts + 1,
+                last_error=error[:1000],
+                next_attempt_at=func.now() + delay * literal_column("interval '1 second'")
+            )
+            .returning(IndexOutbox.id, IndexOutbox.article_id, IndexOutbox.attempts)
+        ).all()
+        db.commit()
+    finally:
+        db.close()
+
+    dead = [row for row in rows if row.attempts >= settings.INDEXER_MAX_ATTEMPTS]
+    for row in dead:
+        metrics.incr("indexer.dead_rows_total")
+        logger.error(
+            f"Outbox row {row.id} for article {row.article_id} gave up after {row.attempts} attempts: {error}"
+        )
+    return [row.id for row in dead]
+
+def _dead_rows_filter():
+    return (IndexOutbox.processed_at.is_(None), IndexOutbox.attempts >= settings.INDEXER_MAX_ATTEMPTS)
+
+def _count_dead_rows() -> int:
+    db = SessionLocal()
+    try:
+        return db.query(func.count(IndexOutbox.id)).filter(*_dead_rows_filter()).scalar()
+    finally:
+        db.close()
+
+def redrive_dead_rows() -> int:
+    """Give rows that ran out of attempts a fresh set; returns how many were re-queued"""
+    db = SessionLocal()
+    try:
+        count = db.query(IndexOutbox).filter(*_dead_rows_filter()).update(
+            {IndexOutbox.attempts: 0, IndexOutbox.next_attempt_at: None},
+            synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+    if count:
+        logger.info(f"Re-queued {count} dead outbox rows")
+    return count
@@ -0,0 +1,483 @@
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import fcntl
+import json
+import uuid
+import numpy as np
+from app.core.config import settings
+from app.core.logging import logger
+from .dim_reduction import DimensionReducer, vector_dim
+from .vector_store import ArticleHit, chunk_point_id
+
+def _as_datetime(value) -> datetime:
+    value = value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    # Naive timestamps are treated as UTC, matching Qdrant's datetime index
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+# Payload fields filtered by equality, kept as integer-coded NumPy columns
+CODED_FIELDS = ("user_id", "username")
+
+def _resized(array: np.ndarray, capacity: int, fill) -> np.ndarray:
+    resized = np.full(capacity, fill, dtype=array.dtype)
+    resized[:len(array)] = array[:capacity]
+    return resized
+
+class LocalVectorStore:
+    """In-process vector index with the same interface as VectorStore.
+
+    Vectors are kept L2-normalized in one float32 matrix, memory-mapped from
+    STORAGE_PATH/vectors when VECTOR_STORE_PERSIST is set. A point-id -> row
+    map tracks them, and deleted rows are tombstoned until compaction. Search
+    is exact brute-force cosine top-k, which makes it deterministic, so it
+    also serves as a benchmark baseline. Filterable payload fields are
+    mirrored in NumPy columns, so filters are vectorised masks too.
+
+    Each batch appends the rows it touched to journal.jsonl; index.json is
+    only rewritten after compaction, every VECTOR_STORE_JOURNAL_MAX_BATCHES
+    batches and on close(). File I/O runs in a worker thread. Compaction
+    writes a new vectors file that index.json names, so the previous
+    snapshot, journal and matrix stay consistent until the swap.
+
+    Single process only: the index lives in this process's memory, so other
+    API workers or a separate indexer would never see its writes. A lock file
+    refuses a second process on the same STORAGE_PATH; run with WORKERS=1
+    and the indexer in-process.
+    """
+
+    def __init__(self):
+        self.collection_name = "articles"
+        self.reducer = DimensionReducer()
+        self.dim = vector_dim()
+        self.path = None
+        if settings.VECTOR_STORE_PERSIST:
+            self.path = Path(settings.STORAGE_PATH) / "vectors" / self.collection_name
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        self._lock_file = None
+        # Snapshot generation; journal lines from older generations are ignored
+        self._epoch = 0
+        self._journaled = 0
+        # Matrix file of the current snapshot, recorded in index.json
+        self._vectors_name = "vectors.f32"
+        self._reset_state()
+
+    def _reset_state(self):
+        self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+        self._count = 0
+        self._ids: List[str] = []
+        self._payloads: List[dict] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._rows: Dict[str, int] = {}
+        self._article_rows: Dict[str, List[int]] = {}
+        self._codes: Dict[str, Dict[str, int]] = {field: {} for field in CODED_FIELDS}
+        self._columns = {field: np.zeros(0, dtype=np.int32) for field in CODED_FIELDS}
+        self._created = np.zeros(0, dtype=np.float64)
+        self._tag_rows: Dict[str, set] = {}
+
+    def _resize_columns(self, capacity: int):
+        self._alive = _resized(self._alive, capacity, False)
+        self._columns = {field: _resized(column, capacity, -1) for field, column in self._columns.items()}
+        self._created = _resized(self._created, capacity, np.nan)
+
+    def _index_payload(self, row: int, payload: dict, previous: Optional[dict] = None):
+        for field in CODED_FIELDS:
+            value = payload.get(field)
+            codes = self._codes[field]
+            self._columns[field][row] = -1 if value is None else codes.setdefault(str(value), len(codes))
+        created_at = payload.get("created_at")
+        self._created[row] = _as_datetime(created_at).timestamp() if created_at else np.nan
+        for tag in (previous or {}).get("tags") or []:
+            self._tag_rows.get(tag, set()).discard(row)
+        for tag in payload.get("tags") or []:
+            self._tag_rows.setdefault(tag, set()).add(row)
+
+    def _filter_mask(self, filters: Optional[dict]) -> Optional[np.ndarray]:
+        """Rows matching `filters` (same semantics as vector_store.build_filter); None when nothing is set"""
+        active = {key: value for key, value in (filters or {}).items() if value}
+        if not active:
+            return None
+        mask = np.ones(self._count, dtype=bool)
+        for field in CODED_FIELDS:
+            if field in active:
+                code = self._codes[field].get(str(active[field]))
+                if code is None:
+                    return np.zeros(self._count, dtype=bool)
+                mask &= self._columns[field][:self._count] == code
+        # Rows without created_at are NaN and fail both comparisons
+        created = self._created[:self._count]
+        if "created_after" in active:
+            mask &= created >= _as_datetime(active["created_after"]).timestamp()
+        if "created_before" in active:
+            mask &= created <= _as_datetime(active["created_before"]).timestamp()
+        if "tags" in active:
+            tagged = np.zeros(self._count, dtype=bool)
+            for tag in active["tags"]:
+                rows = self._tag_rows.get(tag)
+                if rows:
+                    tagged[list(rows)] = True
+            mask &= tagged
+        return mask
+
+    async def ensure_collection(self):
+        if self._loaded:
+            return
+        async with self._lock:
+            if not self._loaded:
+                await asyncio.to_thread(self._load)
+                self._loaded = True
+
+    async def apply_batch(
+        self,
+        upserts: Dict[str, Tuple[np.ndarray, dict]],
+        deletes: Iterable[str] = (),
+        wait: bool = True
+    ):
+        await self.ensure_collection()
+        async with self._lock:
+            await self._apply_batch(upserts, deletes)
+
+    async def _apply_batch(self, upserts: Dict[str, Tuple[np.ndarray, dict]], deletes: Iterable[str]):
+        touched, dead = set(), set()
+        for article_id in deletes:
+            rows = self._article_rows.pop(str(article_id), [])
+            self._delete_rows(rows)
+            dead.update(rows)
+
+        for article_id, (vector, payload) in upserts.items():
+            article_id = str(article_id)
+            vectors = self.reducer.transform(vector.reshape(-1, vector.shape[-1]))
+            rows = []
+            for i, row_vector in enumerate(vectors):
+                point_id = chunk_point_id(article_id, i)
+                rows.append(self._write_row(
+                    point_id,
+                    row_vector,
+                    {**payload, "article_id": article_id, "chunk_index": i}
+                ))
+            # Chunks left over from a longer previous version
+            stale = set(self._article_rows.get(article_id, [])) - set(rows)
+            self._delete_rows(stale)
+            self._article_rows[article_id] = rows
+            touched.update(rows)
+            dead.update(stale)
+
+        if self._count and (~self._alive[:self._count]).sum() > self._count // 2:
+            self._compact()
+            await asyncio.to_thread(self._save)
+        elif self._journaled >= settings.VECTOR_STORE_JOURNAL_MAX_BATCHES:
+            await asyncio.to_thread(self._save)
+        elif self.path is not None:
+            record = {
+                "epoch": self._epoch,
+                "count": self._count,
+                "rows": [[row, self._ids[row], self._payloads[row]] for row in sorted(touched)],
+                "dead": sorted(int(row) for row in dead - touched)
+            }
+            await asyncio.to_thread(self._append_journal, record)
+
+    async def add_article(self, article_id: str, vector: np.ndarray, payload: dict):
+        await self.apply_batch({str(article_id): (vector, payload)})
+        logger.info(f"Added article {article_id} to local vector store")
+
+    async def delete_article(self, article_id: str):
+        await self.apply_batch({}, [str(article_id)])
+        logger.info(f"Deleted article {article_id} from local vector store")
+
+    async def search_articles(
+        self,
+        vector: np.ndarray,
+        limit: int = 5,
+        filters: Optional[dict] = None,
+        offset: int = 0,
+        score_threshold: Optional[float] = None
+    ) -> List[ArticleHit]:
+        await self.ensure_collection()
+        if not self._count:
+            return []
+        # The cheap masks are built on the loop against consistent state; the
+        # matmul and top-k run in a thread on references that writes only append
+        # to or replace wholesale (compaction), never shrink
+        count = self._count
+        valid = self._alive[:count].copy()
+        mask = self._filter_mask(filters)
+        if mask is not None:
+            valid &= mask
+        return await asyncio.to_thread(
+            self._rank, vector, self._vectors[:count], self._payloads, valid, limit, offset, score_threshold
+        )
+
+    def _rank(
+        self,
+        vector: np.ndarray,
+        vectors: np.ndarray,
+        payloads: List[dict],
+        valid: np.ndarray,
+        limit: int,
+        offset: int,
+        score_threshold: Optional[float]
+    ) -> List[ArticleHit]:
+        scores, valid_count = self._scores(vector, vectors, valid, score_threshold)
+        if not valid_count:
+            return []
+        limit += offset
+
+        aggregation = settings.SEARCH_CHUNK_AGGREGATION
+        group_size = settings.SEARCH_CHUNK_TOP_K if aggregation == "sum_top_k" else 1
+        candidates = limit * group_size
+        while True:
+            candidates = min(candidates, valid_count)
+            top = np.argpartition(-scores, candidates - 1)[:candidates]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            groups: Dict[str, List[int]] = {}
+            for row in top:
+                hits = groups.setdefault(payloads[row]["article_id"], [])
+                if len(hits) < group_size:
+                    hits.append(row)
+            if len(groups) >= limit or candidates == valid_count:
+                break
+            candidates *= 4
+
+        hits = [
+            ArticleHit(
+                id=article_id,
+                score=float(scores[rows].sum()) if aggregation == "sum_top_k" else float(scores[rows[0]]),
+                payload=payloads[rows[0]]
+            )
+            for article_id, rows in groups.items()
+        ]
+        hits.sort(key=lambda hit: hit.score, reverse=True)
+        return hits[offset:limit]
+
+    async def has_article(self, article_id: str) -> bool:
+        await self.ensure_collection()
+        return bool(self._article_rows.get(str(article_id)))
+
+    async def scroll_article_ids(self, page_size: int = 1000) -> AsyncIterator[List[str]]:
+        await self.ensure_collection()
+        article_ids = list(self._article_rows)
+        for start in range(0, len(article_ids), page_size):
+            yield article_ids[start:start + page_size]
+
+    async def two_stage_search(
+        self,
+        vector: np.ndarray,
+        limit: int,
+        filters: Optional[dict] = None,
+        prefetch_limit: int = 0,
+        score_threshold: Optional[float] = None
+    ) -> List[ArticleHit]:
+        """Brute force is already exact, so both stages collapse into one search"""
+        return await self.search_articles(vector, limit, filters, score_threshold=score_threshold)
+
+    def _scores(
+        self,
+        vector: np.ndarray,
+        vectors: np.ndarray,
+        valid: np.ndarray,
+        score_threshold: Optional[float] = None
+    ) -> Tuple[np.ndarray, int]:
+        """Cosine score per row, -inf for rows outside `valid` or below the threshold"""
+        query = self.reducer.transform(vector).astype(np.float32)
+        query = query / max(np.linalg.norm(query), 1e-12)
+        scores = vectors @ query
+        if score_threshold is not None:
+            valid &= scores >= score_threshold
+        return np.where(valid, scores, -np.inf), int(valid.sum())
+
+    async def reset_collection(self):
+        """Reset the articles collection"""
+        async with self._lock:
+            self._reset_state()
+            self._journaled = 0
+            if self.path is not None:
+                self._acquire_lock_file()
+                for name in ("index.json", "journal.jsonl"):
+                    (self.path / name).unlink(missing_ok=True)
+                for vectors_file in self.path.glob("vectors*.f32"):
+                    vectors_file.unlink()
+                self._vectors_name = "vectors.f32"
+            self._loaded = True
+        logger.info(f"Reset local collection: {self.collection_name}")
+
+    async def close(self):
+        """Snapshot pending journal entries and release the store's lock file"""
+        async with self._lock:
+            if self._loaded and self._journaled:
+                await asyncio.to_thread(self._save)
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+    def _write_row(self, point_id: str, vector: np.ndarray, payload: dict) -> int:
+        row = self._rows.get(point_id)
+        if row is None:
+            if self._count == len(self._vectors):
+                self._grow(max(1024, 2 * len(self._vectors)))
+            row = self._count
+            self._count += 1
+            self._ids.append(point_id)
+            self._payloads.append(payload)
+            self._rows[point_id] = row
+            self._index_payload(row, payload)
+        else:
+            self._index_payload(row, payload, self._payloads[row])
+            self._payloads[row] = payload
+        self._vectors[row] = vector / max(np.linalg.norm(vector), 1e-12)
+        self._alive[row] = True
+        return row
+
+    def _delete_rows(self, rows: Iterable[int]):
+        for row in rows:
+            self._alive[row] = False
+
+    def _grow(self, capacity: int):
+        if self.path is None:
+            vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+            vectors[:self._count] = self._vectors[:self._count]
+            self._vectors = vectors
+        else:
+            self.path.mkdir(parents=True, exist_ok=True)
+            vectors_file = self.path / self._vectors_name
+            if isinstance(self._vectors, np.memmap):
+                self._vectors.flush()
+            self._vectors = None
+            with open(vectors_file, "ab") as f:
+                f.truncate(capacity * self.dim * 4)
+            self._vectors = np.memmap(vectors_file, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._resize_columns(capacity)
+
+    def _compact(self):
+        """Drop tombstoned rows so the matrix stays dense"""
+        keep = np.flatnonzero(self._alive[:self._count])
+        vectors = np.array(self._vectors[keep])
+        ids = [self._ids[row] for row in keep]
+        payloads = [self._payloads[row] for row in keep]
+
+        self._reset_state()
+        # Row numbers change, so the compacted matrix goes to a new file; the old
+        # one stays valid for the current index.json until _save swaps it out
+        self._vectors_name = f"vectors.{uuid.uuid4().hex[:12]}.f32"
+        self._grow(max(1024, len(keep)))
+        self._vectors[:len(keep)] = vectors
+        self._alive[:len(keep)] = True
+        self._count = len(keep)
+        self._ids = ids
+        self._payloads = payloads
+        self._rebuild_maps()
+        logger.info(f"Compacted local vector store to {self._count} rows")
+
+    def _rebuild_maps(self):
+        self._rows = {point_id: row for row, point_id in enumerate(self._ids)}
+        self._article_rows = {}
+        for row in np.flatnonzero(self._alive[:self._count]):
+            self._article_rows.setdefault(self._payloads[row]["article_id"], []).append(int(row))
+        self._codes = {field: {} for field in CODED_FIELDS}
+        self._tag_rows = {}
+        for row, payload in enumerate(self._payloads):
+            self._index_payload(row, payload)
+
+    def _acquire_lock_file(self):
+        if self._lock_file is not None:
+            return
+        self.path.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.path / "lock", "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise RuntimeError(
+                f"Local vector store at {self.path} is in use by another process; "
+                f"the local backend is single-process (WORKERS=1, indexer in-process)"
+            )
+        self._lock_file = lock_file
+
+    def _load(self):
+        if self.path is None:
+            return
+        self._acquire_lock_file()
+        index = None
+        if (self.path / "index.json").exists():
+            with open(self.path / "index.json", encoding="utf-8") as f:
+                index = json.load(f)
+            if index["dim"] != self.dim:
+                raise ValueError(f"Local vector store at {self.path} has dim {index['dim']}, expected {self.dim}")
+            self._vectors_name = index.get("vectors", "vectors.f32")
+        vectors_file = self.path / self._vectors_name
+        if not vectors_file.exists():
+            return
+        capacity = vectors_file.stat().st_size // (self.dim * 4)
+        self._vectors = np.memmap(vectors_file, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._resize_columns(capacity)
+
+        if index is not None:
+            self._epoch = index.get("epoch", 0)
+            self._count = len(index["ids"])
+            self._ids = index["ids"]
+            self._payloads = index["payloads"]
+            self._alive[:self._count] = index["alive"]
+        self._replay_journal()
+        self._rebuild_maps()
+        logger.info(f"Loaded local vector store with {len(self._article_rows)} articles from {self.path}")
+
+    def _replay_journal(self):
+        journal = self.path / "journal.jsonl"
+        if not journal.exists():
+            return
+        with open(journal, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn last line from a crash mid-append; that batch was never acknowledged
+                    logger.warning(f"Skipping unreadable journal line in {journal}")
+                    break
+                if record["epoch"] != self._epoch:
+                    continue
+                missing = record["count"] - self._count
+                self._ids.extend([None] * missing)
+                self._payloads.extend([None] * missing)
+                self._count = record["count"]
+                for row, point_id, payload in record["rows"]:
+                    self._ids[row] = point_id
+                    self._payloads[row] = payload
+                    self._alive[row] = True
+                self._alive[record["dead"]] = False
+                self._journaled += 1
+
+    def _append_journal(self, record: dict):
+        # Vectors reach the disk before the journal line that references them
+        if isinstance(self._vectors, np.memmap):
+            self._vectors.flush()
+        with open(self.path / "journal.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._journaled += 1
+
+    def _save(self):
+        if self.path is None:
+            return
+        self.path.mkdir(parents=True, exist_ok=True)
+        if isinstance(self._vectors, np.memmap):
+            self._vectors.flush()
+        epoch = self._epoch + 1
+        index = {
+            "dim": self.dim,
+            "epoch": epoch,
+            "vectors": self._vectors_name,
+            "ids": self._ids,
+            "payloads": self._payloads,
+            "alive": self._alive[:self._count].tolist()
+        }
+        tmp_path = self.path / "index.json.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        tmp_path.replace(self.path / "index.json")
+        self._epoch = epoch
+        # The new epoch already invalidates the journal; truncating just reclaims space
+        (self.path / "journal.jsonl").unlink(missing_ok=True)
+        self._journaled = 0
+        # Matrices from before a compaction, or orphaned by a crash during one
+        for vectors_file in self.path.glob("vectors*.f32"):
+            if vectors_file.name != self._vectors_name:
+                vectors_file.unlink()
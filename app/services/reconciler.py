@@ -0,0 +1,146 @@
+from dataclasses import dataclass, asdict
+from itertools import islice
+from typing import Iterable, List
+import asyncio
+import time
+import uuid
+import numpy as np
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.logging import logger
+from app.core.metrics import metrics
+from app.models import Article
+from .functions.article_functions import article_payload
+
+@dataclass
+class ReconcileReport:
+    indexed_articles: int = 0
+    postgres_articles: int = 0
+    missing: int = 0
+    orphaned: int = 0
+    reindexed: int = 0
+    deleted: int = 0
+    seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+def _id_array(article_ids: Iterable) -> np.ndarray:
+    """Article ids as a 16-byte-per-id array, sortable and searchable with NumPy"""
+    return np.array([uuid.UUID(str(article_id)).bytes for article_id in article_ids], dtype="S16")
+
+def _id_strings(ids: np.ndarray) -> List[str]:
+    # NumPy strips trailing NUL bytes from "S" items; pad them back to 16 bytes
+    return [str(uuid.UUID(bytes=value.ljust(16, b"\0"))) for value in ids]
+
+class Reconciler:
+    """Batched Postgres <-> vector store consistency check and repair.
+
+    Every indexed article id is scrolled into one sorted 16-byte-per-id array.
+    Postgres ids are then streamed through a server-side cursor and checked in
+    chunks with searchsorted, so memory stays at 16 bytes per indexed article
+    plus one chunk of Postgres rows.
+    Articles missing from the index are re-embedded and upserted in bulk.
+    Indexed articles missing from Postgres are re-checked (they may have been
+    created mid-run) and then bulk deleted.
+    """
+
+    def __init__(self, vector_store, embedding_service, batch_size: int = 0, dry_run: bool = False):
+        self.vector_store = vector_store
+        self.embedding_service = embedding_service
+        self.batch_size = batch_size or settings.RECONCILE_BATCH_SIZE
+        self.dry_run = dry_run
+        self.report = ReconcileReport()
+
+    async def run(self) -> ReconcileReport:
+        started = time.perf_counter()
+        indexed = await self._indexed_ids()
+        self.report.indexed_articles = len(indexed)
+        seen = np.zeros(len(indexed), dtype=bool)
+        logger.info(f"Reconcile: {len(indexed)} indexed articles loaded in {time.perf_counter() - started:.1f}s")
+
+        db = SessionLocal()
+        try:
+            rows = iter(db.query(Article.id).order_by(Article.id).yield_per(self.batch_size))
+            while True:
+                chunk = await asyncio.to_thread(lambda: [row.id for row in islice(rows, self.batch_size)])
+                if not chunk:
+                    break
+                ids = _id_array(chunk)
+                positions = np.searchsorted(indexed, ids)
+                found = positions < len(indexed)
+                found[found] = indexed[positions[found]] == ids[found]
+                seen[positions[found]] = True
+
+                self.report.postgres_articles += len(chunk)
+                missing = [article_id for article_id, hit in zip(chunk, found) if not hit]
+                self.report.missing += len(missing)
+                if missing:
+                    await self._reindex(missing)
+                self._progress(started)
+        finally:
+            db.close()
+
+        orphaned = indexed[~seen]
+        self.report.orphaned = len(orphaned)
+        for start in range(0, len(orphaned), self.batch_size):
+            await self._delete_orphans(_id_strings(orphaned[start:start + self.batch_size]))
+
+        self.report.seconds = time.perf_counter() - started
+        metrics.incr("reconcile.reindexed", self.report.reindexed)
+        metrics.incr("reconcile.deleted", self.report.deleted)
+        logger.info(f"Reconcile finished{' (dry run)' if self.dry_run else ''}: {self.report.as_dict()}")
+        return self.report
+
+    async def _indexed_ids(self) -> np.ndarray:
+        pages = []
+        async for article_ids in self.vector_store.scroll_article_ids(self.batch_size):
+            # Chunks of one article repeat its id; dedupe per page to keep pages small
+            pages.append(np.unique(_id_array(set(article_ids))))
+        if not pages:
+            return np.zeros(0, dtype="S16")
+        return np.unique(np.concatenate(pages))
+
+    async def _reindex(self, article_ids: List[str]):
+        if self.dry_run:
+            return
+        db = SessionLocal()
+        try:
+            articles = await asyncio.to_thread(
+                lambda: db.query(Article).filter(Article.id.in_(article_ids)).all()
+            )
+        finally:
+            db.close()
+        if not articles:
+            return
+
+        embeddings = await self.embedding_service.embed_documents([article.content_text for article in articles])
+        await self.vector_store.apply_batch({
+            str(article.id): (vectors, article_payload(article))
+            for article, vectors in zip(articles, embeddings)
+            if len(vectors)
+        })
+        self.report.reindexed += len(articles)
+
+    async def _delete_orphans(self, article_ids: List[str]):
+        # Articles created after their id range was streamed are not orphans
+        db = SessionLocal()
+        try:
+            existing = await asyncio.to_thread(
+                lambda: {str(row.id) for row in db.query(Article.id).filter(Article.id.in_(article_ids))}
+            )
+        finally:
+            db.close()
+        orphans = [article_id for article_id in article_ids if article_id not in existing]
+        self.report.orphaned -= len(article_ids) - len(orphans)
+        if orphans and not self.dry_run:
+            await self.vector_store.apply_batch({}, orphans)
+            self.report.deleted += len(orphans)
+
+    def _progress(self, started: float):
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Reconcile: {self.report.postgres_articles} articles checked "
+            f"({self.report.postgres_articles / max(elapsed, 1e-9):.0f}/s), "
+            f"{self.report.missing} missing, {self.report.reindexed} reindexed"
+        )
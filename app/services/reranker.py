@@ -0,0 +1,48 @@
+from typing import List
+import numpy as np
+from app.core.config import settings
+from app.core.logging import logger
+from .vector_store import ArticleHit
+
+class CrossEncoderReranker:
+    """Small sequence-classification model scoring (query, title + snippet) pairs on CPU"""
+
+    def __init__(self, model_name: str):
+        import torch
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+        self.torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        self.model.eval()
+        self.batch_size = max(1, settings.SEARCH_RERANK_BATCH_SIZE)
+        logger.info(f"Loaded cross-encoder reranker {model_name}")
+
+    def score(self, query: str, hits: List[ArticleHit]) -> np.ndarray:
+        """Relevance logit per hit (blocking; run it off the event loop)"""
+        texts = [f"{hit.payload.get('title', '')}\n{hit.payload.get('snippet', '')}" for hit in hits]
+        scores = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            inputs = self.tokenizer(
+                [query] * len(batch),
+                batch,
+                padding=True,
+                truncation=True,
+                max_length=512,
+                return_tensors="pt"
+            )
+            with self.torch.no_grad():
+                logits = self.model(**inputs).logits
+            # Single-logit models score relevance directly; two-class models use the positive class
+            scores.append((logits[:, -1] if logits.shape[-1] > 1 else logits[:, 0]).numpy())
+        return np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32)
+
+    def rerank(self, query: str, hits: List[ArticleHit], limit: int) -> List[ArticleHit]:
+        scores = self.score(query, hits)
+        reranked = [
+            ArticleHit(id=hit.id, score=float(score), payload=hit.payload)
+            for hit, score in zip(hits, scores)
+        ]
+        reranked.sort(key=lambda hit: hit.score, reverse=True)
+        return reranked[:limit]
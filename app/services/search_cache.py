@@ -0,0 +1,136 @@
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+import hashlib
+import json
+import time
+import unicodedata
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import metrics
+
+GENERATION_KEY = "search:generation"
+
+class SearchCache:
+    """Search result cache invalidated by a corpus generation counter.
+
+    Cache keys include the generation read before the search ran. Every
+    article write bumps the generation, so results computed against an older
+    corpus can never be served again; they just age out through the TTL or
+    LRU. With the redis backend the generation and the entries are shared by
+    all workers, and the in-process LRU sits in front of Redis.
+    """
+
+    def __init__(self):
+        self.backend = settings.SEARCH_CACHE_BACKEND
+        self.max_size = settings.SEARCH_CACHE_SIZE
+        self.ttl = settings.SEARCH_CACHE_TTL
+        self._memory = OrderedDict()
+        self._generation = 0
+        self._hits = 0
+        self._lookups = 0
+        self._redis = None
+
+        if self.backend == "redis":
+            from redis import asyncio as aioredis
+            self._redis = aioredis.Redis.from_url(settings.REDIS_URL)
+        elif self.backend not in ("memory", "none"):
+            raise ValueError(f"Unknown search cache backend: {self.backend}")
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+    async def generation(self) -> Optional[int]:
+        """Current corpus generation; None when it cannot be read"""
+        try:
+            return await self._current_generation()
+        except Exception as e:
+            logger.warning(f"Search cache generation lookup failed: {e}")
+            return None
+
+    async def get(
+        self,
+        query: str,
+        limit: int,
+        params: dict,
+        generation: Optional[int] = None
+    ) -> Tuple[Optional[str], Optional[List[Any]]]:
+        """Return (key, cached results); pass the key to set() after a miss.
+
+        `generation` saves a second lookup when the caller already read it.
+        """
+        if self.backend == "none":
+            return None, None
+        if generation is None:
+            generation = await self.generation()
+            if generation is None:
+                return None, None
+
+        raw = json.dumps([generation, self.normalize(query), limit, params], sort_keys=True, default=str)
+        key = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+        results = self._memory_get(key)
+        if results is None and self._redis is not None:
+            try:
+                value = await self._redis.get(f"search:{key}")
+            except Exception as e:
+                logger.warning(f"Search cache lookup failed: {e}")
+                value = None
+            if value is not None:
+                results = json.loads(value)
+                self._memory_set(key, results)
+
+        self._record(results is not None)
+        return key, results
+
+    async def set(self, key: Optional[str], results: List[Any]):
+        if key is None:
+            return
+        self._memory_set(key, results)
+        if self._redis is not None:
+            try:
+                await self._redis.set(f"search:{key}", json.dumps(results, default=str), ex=self.ttl)
+            except Exception as e:
+                logger.warning(f"Search cache write failed: {e}")
+
+    async def invalidate(self):
+        """Bump the corpus generation after an article write"""
+        self._generation += 1
+        if self._redis is None:
+            self._memory.clear()
+        else:
+            try:
+                await self._redis.incr(GENERATION_KEY)
+            except Exception as e:
+                # Without a shared bump other workers could serve stale results
+                self._memory.clear()
+                logger.error(f"Search cache invalidation failed: {e}")
+        metrics.incr("search_cache.invalidations")
+
+    async def _current_generation(self) -> int:
+        if self._redis is None:
+            return self._generation
+        value = await self._redis.get(GENERATION_KEY)
+        return int(value or 0)
+
+    def _memory_get(self, key: str) -> Optional[List[Any]]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires_at, results = entry
+        if expires_at < time.monotonic():
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return results
+
+    def _memory_set(self, key: str, results: List[Any]):
+        self._memory[key] = (time.monotonic() + self.ttl, results)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def _record(self, hit: bool):
+        self._lookups += 1
+        self._hits += hit
+        metrics.incr("search_cache.hits" if hit else "search_cache.misses")
+        metrics.set_gauge("search_cache.hit_rate", self._hits / self._lookups)
@@ -1,90 +1,405 @@
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models
 from app.core.config import settings
 from app.core.logging import logger
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import httpx
 import numpy as np
+import uuid
+from .dim_reduction import DimensionReducer, vector_dim
 # from app.core.config import QDRANT_CLIENT_URL, QDRANT_CLIENT_PORT
-# from qdrant_client.async_client import AsyncQdrantClient
 # from app.core.config import EMBEDDING_DIM
 
+@dataclass
+class ArticleHit:
+    """A search result folded back from chunk points to article level"""
+    id: str
+    score: float
+    payload: dict
+
+def chunk_point_id(article_id: str, chunk_index: int) -> str:
+    return str(uuid.uuid5(uuid.UUID(str(article_id)), str(chunk_index)))
+
+def article_filter(article_id: str, from_chunk: int = 0) -> models.Filter:
+    """Match an article's chunk points from `from_chunk` on, plus its pre-chunking point"""
+    chunks = [models.FieldCondition(key="article_id", match=models.MatchValue(value=str(article_id)))]
+    if from_chunk:
+        chunks.append(models.FieldCondition(key="chunk_index", range=models.Range(gte=from_chunk)))
+    return models.Filter(
+        should=[
+            models.Filter(must=chunks),
+            models.HasIdCondition(has_id=[str(article_id)])
+        ]
+    )
+
+def articles_filter(article_ids: List[str]) -> models.Filter:
+    """Match every point of the given articles"""
+    article_ids = [str(article_id) for article_id in article_ids]
+    return models.Filter(
+        should=[
+            models.FieldCondition(key="article_id", match=models.MatchAny(any=article_ids)),
+            models.HasIdCondition(has_id=article_ids)
+        ]
+    )
+
+# Payload fields that search can filter on, with their Qdrant index type
+PAYLOAD_INDEXES = {
+    "article_id": models.PayloadSchemaType.KEYWORD,
+    "user_id": models.PayloadSchemaType.KEYWORD,
+    "username": models.PayloadSchemaType.KEYWORD,
+    "created_at": models.PayloadSchemaType.DATETIME,
+    "tags": models.PayloadSchemaType.KEYWORD,
+}
+
+def build_filter(filters: Optional[dict]) -> Optional[models.Filter]:
+    """Translate search filters (user_id, username, created_after/before, tags) into a Qdrant filter"""
+    if not filters:
+        return None
+    conditions = []
+    if filters.get("user_id"):
+        conditions.append(models.FieldCondition(key="user_id", match=models.MatchValue(value=str(filters["user_id"]))))
+    if filters.get("username"):
+        conditions.append(models.FieldCondition(key="username", match=models.MatchValue(value=filters["username"])))
+    if filters.get("created_after") or filters.get("created_before"):
+        conditions.append(models.FieldCondition(
+            key="created_at",
+            range=models.DatetimeRange(gte=filters.get("created_after"), lte=filters.get("created_before"))
+        ))
+    if filters.get("tags"):
+        conditions.append(models.FieldCondition(key="tags", match=models.MatchAny(any=list(filters["tags"]))))
+    return models.Filter(must=conditions) if conditions else None
+
+def collection_config(
+    m: Optional[int] = None,
+    ef_construct: Optional[int] = None,
+    quantization: Optional[str] = None,
+    on_disk: Optional[bool] = None,
+    size: Optional[int] = None
+) -> dict:
+    """create_collection arguments for HNSW, quantization and storage; defaults come from settings"""
+    quantization = quantization or settings.QDRANT_QUANTIZATION
+    quantization_config = None
+    if quantization == "scalar":
+        quantization_config = models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=settings.QDRANT_QUANTIZATION_ALWAYS_RAM
+            )
+        )
+    elif quantization == "binary":
+        quantization_config = models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=settings.QDRANT_QUANTIZATION_ALWAYS_RAM)
+        )
+    elif quantization != "none":
+        raise ValueError(f"Unknown quantization: {quantization}")
+
+    return {
+        "vectors_config": models.VectorParams(
+            size=size or vector_dim(),
+            distance=models.Distance.COSINE,
+            # Originals can live on disk when quantized copies stay in RAM for traversal
+            on_disk=settings.QDRANT_VECTORS_ON_DISK if on_disk is None else on_disk
+        ),
+        "hnsw_config": models.HnswConfigDiff(
+            m=m or settings.QDRANT_HNSW_M,
+            ef_construct=ef_construct or settings.QDRANT_HNSW_EF_CONSTRUCT
+        ),
+        "quantization_config": quantization_config
+    }
+
+def search_params(
+    hnsw_ef: Optional[int] = None,
+    oversampling: Optional[float] = None,
+    rescore: Optional[bool] = None
+) -> models.SearchParams:
+    """Query-time HNSW beam width and quantized-search oversampling/rescoring"""
+    hnsw_ef = hnsw_ef or settings.QDRANT_HNSW_EF
+    return models.SearchParams(
+        hnsw_ef=hnsw_ef or None,
+        quantization=models.QuantizationSearchParams(
+            oversampling=oversampling or settings.QDRANT_OVERSAMPLING,
+            rescore=settings.QDRANT_RESCORE if rescore is None else rescore
+        )
+    )
+
+def create_client(prefer_grpc: Optional[bool] = None) -> AsyncQdrantClient:
+    """Long-lived async client; REST calls share one keep-alive pool, gRPC one channel"""
+    return AsyncQdrantClient(
+        settings.QDRANT_CLIENT_URL,
+        port=settings.QDRANT_CLIENT_PORT,
+        grpc_port=settings.QDRANT_GRPC_PORT,
+        prefer_grpc=settings.QDRANT_PREFER_GRPC if prefer_grpc is None else prefer_grpc,
+        limits=httpx.Limits(
+            max_connections=settings.QDRANT_POOL_SIZE,
+            max_keepalive_connections=settings.QDRANT_POOL_SIZE
+        )
+    )
+
+async def alias_target(client: AsyncQdrantClient, alias: str) -> Optional[str]:
+    """Collection the alias points at, or None if `alias` is not an alias"""
+    aliases = (await client.get_aliases()).aliases
+    return next((item.collection_name for item in aliases if item.alias_name == alias), None)
+
+async def switch_alias(client: AsyncQdrantClient, alias: str, collection_name: str) -> Optional[str]:
+    """Atomically repoint `alias` at `collection_name`; returns the previous collection.
+
+    A plain collection still named like the alias (pre-alias deployments) has
+    to be dropped first, so that first switch has a brief gap.
+    """
+    previous = await alias_target(client, alias)
+    operations = []
+    if previous is not None:
+        operations.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias)))
+    elif await client.collection_exists(alias):
+        logger.warning(f"Dropping plain collection {alias} to replace it with an alias")
+        await client.delete_collection(alias)
+        previous = alias
+    operations.append(models.CreateAliasOperation(
+        create_alias=models.CreateAlias(collection_name=collection_name, alias_name=alias)
+    ))
+    await client.update_collection_aliases(change_aliases_operations=operations)
+    logger.info(f"Alias {alias} -> {collection_name} (was {previous})")
+    return previous
+
 class VectorStore:
-    def __init__(self):
-        self.client = QdrantClient(settings.QDRANT_CLIENT_URL, port=settings.QDRANT_CLIENT_PORT)
-        self.collection_name = "articles"
-        self._ensure_collection()
+    def __init__(self, collection_name: str = "articles"):
+        self.client = create_client()
+        # Usually the `articles` alias (see scripts/reembed.py), but may be a plain collection
+        self.collection_name = collection_name
+        self.reducer = DimensionReducer()
+        self._collection_ready = False
+        self._collection_lock = asyncio.Lock()
 
-    def _ensure_collection(self):
-        try:
-            self.client.get_collection(self.collection_name)
-        except Exception:
-            self.client.create_collection(
+    async def ensure_collection(self):
+        if self._collection_ready:
+            return
+        async with self._collection_lock:
+            if not self._collection_ready:
+                await self._ensure_collection()
+                self._collection_ready = True
+
+    async def _ensure_collection(self):
+        if await alias_target(self.client, self.collection_name) is None and \
+                not await self.client.collection_exists(self.collection_name):
+            await self.client.create_collection(
                 collection_name=self.collection_name,
-                vectors_config=models.VectorParams(
-                    size=settings.EMBEDDING_DIM,
-                    distance=models.Distance.COSINE
-                )
+                **collection_config()
             )
             logger.info(f"Created collection: {self.collection_name}")
+        await self._ensure_payload_indexes()
 
-    async def add_article(self, article_id: str, vector: np.ndarray, payload: dict):
-        try:
-            self.client.upsert(
+    async def _ensure_payload_indexes(self):
+        # Indexed fields let Qdrant prune candidates during HNSW traversal
+        for field_name, field_schema in PAYLOAD_INDEXES.items():
+            await self.client.create_payload_index(
                 collection_name=self.collection_name,
-                points=[
-                    models.PointStruct(
-                        id=article_id,
-                        vector=vector.tolist(),
-                        payload=payload
-                    )
-                ]
+                field_name=field_name,
+                field_schema=field_schema
             )
+
+    def _chunk_points(self, article_id: str, vector: np.ndarray, payload: dict) -> List[models.PointStruct]:
+        vectors = self.reducer.transform(vector.reshape(-1, vector.shape[-1]))
+        return [
+            models.PointStruct(
+                id=chunk_point_id(article_id, i),
+                vector=row.tolist(),
+                payload={**payload, "article_id": str(article_id), "chunk_index": i}
+            )
+            for i, row in enumerate(vectors)
+        ]
+
+    async def apply_batch(
+        self,
+        upserts: Dict[str, Tuple[np.ndarray, dict]],
+        deletes: Iterable[str] = (),
+        wait: bool = True
+    ):
+        """Apply many article upserts and deletes in one request.
+
+        Each upsert writes one point per chunk row and drops the chunks left
+        over from a longer previous version.
+        """
+        operations = []
+        deletes = list(deletes)
+        if deletes:
+            operations.append(models.DeleteOperation(
+                delete=models.FilterSelector(filter=articles_filter(deletes))
+            ))
+
+        points = []
+        for article_id, (vector, payload) in upserts.items():
+            article_points = self._chunk_points(article_id, vector, payload)
+            points.extend(article_points)
+            operations.append(models.DeleteOperation(
+                delete=models.FilterSelector(
+                    filter=article_filter(article_id, from_chunk=len(article_points))
+                )
+            ))
+        if points:
+            # Upsert before the stale-chunk deletes so an article is never missing
+            operations.insert(1 if deletes else 0, models.UpsertOperation(
+                upsert=models.PointsList(points=points)
+            ))
+
+        if not operations:
+            return
+        await self.ensure_collection()
+        await self.client.batch_update_points(
+            collection_name=self.collection_name,
+            update_operations=operations,
+            wait=wait
+        )
+
+    async def add_article(self, article_id: str, vector: np.ndarray, payload: dict):
+        """Upsert one point per chunk row of `vector`"""
+        try:
+            await self.apply_batch({str(article_id): (vector, payload)})
             logger.info(f"Added article {article_id} to vector store")
         except Exception as e:
             logger.error(f"Error adding article to vector store: {e}")
             raise
 
-    async def search_articles(self, vector: np.ndarray, limit: int = 5):
+    async def search_articles(
+        self,
+        vector: np.ndarray,
+        limit: int = 5,
+        filters: Optional[dict] = None,
+        offset: int = 0,
+        score_threshold: Optional[float] = None
+    ) -> List[ArticleHit]:
+        """Top articles from `offset`; chunks scoring below `score_threshold` are ignored"""
         try:
-            results = self.client.search(
+            aggregation = settings.SEARCH_CHUNK_AGGREGATION
+            await self.ensure_collection()
+            # The groups API has no offset, so skipped groups are fetched and dropped
+            results = await self.client.query_points_groups(
                 collection_name=self.collection_name,
-                query_vector=vector.tolist(),
-                limit=limit
+                query=self.reducer.transform(vector).tolist(),
+                group_by="article_id",
+                limit=offset + limit,
+                group_size=settings.SEARCH_CHUNK_TOP_K if aggregation == "sum_top_k" else 1,
+                query_filter=build_filter(filters),
+                search_params=search_params(),
+                score_threshold=score_threshold,
+                with_payload=True
             )
-            return results
+            return [
+                ArticleHit(
+                    id=str(group.id),
+                    score=sum(hit.score for hit in group.hits) if aggregation == "sum_top_k" else group.hits[0].score,
+                    payload=group.hits[0].payload
+                )
+                for group in results.groups[offset:]
+            ]
         except Exception as e:
             logger.error(f"Error searching vector store: {e}")
             raise
-        
-    async def delete_article(self, article_id: str):
+
+    async def two_stage_search(
+        self,
+        vector: np.ndarray,
+        limit: int,
+        filters: Optional[dict] = None,
+        prefetch_limit: int = 0,
+        score_threshold: Optional[float] = None
+    ) -> List[ArticleHit]:
+        """Two-stage search inside Qdrant: a low-ef quantized prefetch of `prefetch_limit`
+        chunks, rescored with the original vectors and grouped per article. Only the
+        final hits cross the wire, never the candidate vectors."""
         try:
-            self.client.delete(
+            aggregation = settings.SEARCH_CHUNK_AGGREGATION
+            await self.ensure_collection()
+            query = self.reducer.transform(vector).tolist()
+            results = await self.client.query_points_groups(
                 collection_name=self.collection_name,
-                points_selector=models.PointIdsList(
-                    points=[article_id]
+                prefetch=models.Prefetch(
+                    query=query,
+                    filter=build_filter(filters),
+                    limit=max(prefetch_limit or settings.SEARCH_PREFETCH_LIMIT, limit),
+                    params=search_params(hnsw_ef=settings.SEARCH_PREFETCH_EF, rescore=False)
+                ),
+                query=query,
+                group_by="article_id",
+                limit=limit,
+                group_size=settings.SEARCH_CHUNK_TOP_K if aggregation == "sum_top_k" else 1,
+                search_params=models.SearchParams(
+                    quantization=models.QuantizationSearchParams(rescore=True)
+                ),
+                score_threshold=score_threshold,
+                with_payload=True
+            )
+            return [
+                ArticleHit(
+                    id=str(group.id),
+                    score=sum(hit.score for hit in group.hits) if aggregation == "sum_top_k" else group.hits[0].score,
+                    payload=group.hits[0].payload
                 )
+                for group in results.groups
+            ]
+        except Exception as e:
+            logger.error(f"Error in two-stage vector search: {e}")
+            raise
+
+    async def has_article(self, article_id: str) -> bool:
+        await self.ensure_collection()
+        result = await self.client.count(
+            collection_name=self.collection_name,
+            count_filter=article_filter(article_id),
+            exact=True
+        )
+        return result.count > 0
+
+    async def scroll_article_ids(self, page_size: int = 1000) -> AsyncIterator[List[str]]:
+        """Yield the article id of every point, one scroll page at a time (ids repeat per chunk)"""
+        await self.ensure_collection()
+        offset = None
+        while True:
+            points, offset = await self.client.scroll(
+                collection_name=self.collection_name,
+                limit=page_size,
+                offset=offset,
+                with_payload=["article_id"],
+                with_vectors=False
             )
+            # Pre-chunking points have no article_id payload; their id is the article id
+            yield [str((point.payload or {}).get("article_id", point.id)) for point in points]
+            if offset is None:
+                break
+
+    async def delete_article(self, article_id: str):
+        try:
+            await self.apply_batch({}, [str(article_id)])
             logger.info(f"Deleted article {article_id} from vector store")
         except Exception as e:
             logger.error(f"Error deleting article from vector store: {e}")
             raise
-        
-        
+
+
     async def reset_collection(self):
         """Reset the articles collection"""
         try:
+            # Drop the aliased collection as well as the alias itself
+            target = await alias_target(self.client, self.collection_name)
+            if target is not None:
+                await self.client.update_collection_aliases(change_aliases_operations=[
+                    models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=self.collection_name))
+                ])
+                await self.client.delete_collection(target)
             # Delete if exists
             try:
-                self.client.delete_collection(self.collection_name)
+                await self.client.delete_collection(self.collection_name)
             except Exception:
                 pass
             # Create new collection
-            self.client.create_collection(
+            await self.client.create_collection(
                 collection_name=self.collection_name,
-                vectors_config=models.VectorParams(
-                    size=settings.EMBEDDING_DIM,
-                    distance=models.Distance.COSINE
-                )
+                **collection_config()
             )
+            await self._ensure_payload_indexes()
+            self._collection_ready = True
             logger.info(f"Reset collection: {self.collection_name}")
         except Exception as e:
             logger.error(f"Error resetting collection: {e}")
@@ -0,0 +1,137 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import metrics
+
+class VectorWriter:
+    """Buffers article upserts/deletes and writes them to the vector store in batches.
+
+    Repeated writes to the same article are coalesced (the last one wins).
+    Buffered writes are flushed every VECTOR_WRITE_INTERVAL_MS or once
+    VECTOR_WRITE_BATCH_SIZE articles are waiting. Callers that pass
+    `durable=True` wait until Qdrant has applied their write. `on_flush` is
+    awaited after every successful batch.
+    """
+
+    def __init__(self, vector_store, on_flush: Optional[Callable[[], Awaitable[None]]] = None):
+        self.vector_store = vector_store
+        self.on_flush = on_flush
+        self.batch_size = max(1, settings.VECTOR_WRITE_BATCH_SIZE)
+        self.interval = settings.VECTOR_WRITE_INTERVAL_MS / 1000
+        self.max_pending = max(self.batch_size, settings.VECTOR_WRITE_MAX_PENDING)
+        # article_id -> (vector, payload) for upserts, None for deletes
+        self._pending: Dict[str, Optional[Tuple[np.ndarray, dict]]] = {}
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._drained: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    async def upsert(self, article_id: str, vector: np.ndarray, payload: dict, durable: bool = False):
+        await self._submit(str(article_id), (vector, payload), durable)
+
+    async def delete(self, article_id: str, durable: bool = False):
+        await self._submit(str(article_id), None, durable)
+
+    async def flush(self):
+        """Write everything buffered so far and wait until Qdrant has applied it"""
+        self._start()
+        while self._pending:
+            await self._flush_batch(force_wait=True)
+
+    async def close(self):
+        """Stop the background flusher and write out whatever is still buffered"""
+        self._closed = True
+        if self._task is not None:
+            # Let an in-progress flush finish rather than cancelling it mid-write
+            self._wake.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def _start(self):
+        if self._flush_lock is None:
+            self._wake = asyncio.Event()
+            self._drained = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+        if self._task is None and not self._closed:
+            self._task = asyncio.create_task(self._run())
+
+    async def _submit(self, article_id: str, operation, durable: bool):
+        self._start()
+        # Backpressure: hold new articles back while the buffer is full
+        while len(self._pending) >= self.max_pending and article_id not in self._pending:
+            metrics.incr("vector_writer.backpressure_waits")
+            self._drained.clear()
+            self._wake.set()
+            await self._drained.wait()
+
+        if article_id in self._pending:
+            metrics.incr("vector_writer.coalesced")
+        self._pending[article_id] = operation
+        metrics.set_gauge("vector_writer.pending", len(self._pending))
+
+        future = None
+        if durable:
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.setdefault(article_id, []).append(future)
+        if durable or len(self._pending) >= self.batch_size:
+            self._wake.set()
+        if future is not None:
+            await future
+
+    async def _run(self):
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            while self._pending:
+                await self._flush_batch()
+
+    async def _flush_batch(self, force_wait: bool = False):
+        async with self._flush_lock:
+            article_ids = list(self._pending)[:self.batch_size]
+            if not article_ids:
+                return
+            batch = {article_id: self._pending.pop(article_id) for article_id in article_ids}
+            waiters = [
+                future
+                for article_id in article_ids
+                for future in self._waiters.pop(article_id, [])
+            ]
+            metrics.set_gauge("vector_writer.pending", len(self._pending))
+
+            upserts = {article_id: op for article_id, op in batch.items() if op is not None}
+            deletes = [article_id for article_id, op in batch.items() if op is None]
+            # Only block on Qdrant's write when someone is waiting for durability
+            wait = force_wait or bool(waiters)
+
+            started = time.perf_counter()
+            try:
+                await self.vector_store.apply_batch(upserts, deletes, wait=wait)
+            except Exception as e:
+                logger.error(f"Error flushing {len(batch)} vector writes ({', '.join(article_ids)}): {e}")
+                metrics.incr("vector_writer.failed_writes", len(batch))
+                for future in waiters:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                metrics.observe("vector_writer.batch_size", len(batch))
+                metrics.observe("vector_writer.flush_ms", (time.perf_counter() - started) * 1000)
+                if self.on_flush is not None:
+                    try:
+                        await self.on_flush()
+                    except Exception as e:
+                        logger.error(f"Vector writer flush callback failed: {e}")
+                for future in waiters:
+                    if not future.done():
+                        future.set_result(None)
+            finally:
+                if len(self._pending) < self.max_pending:
+                    self._drained.set()
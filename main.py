@@ -1,10 +1,26 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import asyncio
+import os
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.api.v1 import api_router
 from app.services.functions import *  # This will register all functions
 from app.core.config import settings
+from app.core.database import async_engine, count_queries
+from app.core.metrics import metrics, process_memory
+from app.services.container import services
 
-app = FastAPI(title="LLM API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so /health answers while models load
+    warmup_task = asyncio.create_task(services.warmup())
+    yield
+    warmup_task.cancel()
+    await services.shutdown()
+    await async_engine.dispose()
+
+app = FastAPI(title="LLM API", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -15,12 +31,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def count_db_queries(request: Request, call_next):
+    # Database round trips per request, as a response header and per-route summary
+    counter = count_queries()
+    response = await call_next(request)
+    response.headers["X-DB-Queries"] = str(counter[0])
+    route = request.scope.get("route")
+    if route is not None:
+        metrics.observe(f"db.queries.{request.method} {route.path}", counter[0])
+    return response
+
 # Include routers
 app.include_router(api_router, prefix="/api/v1")
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/ready")
+async def readiness_check():
+    if not services.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "starting", "error": services.warmup_error}
+        )
+    return {"status": "ready", "startup_seconds": services.startup_seconds}
+
+@app.get("/metrics")
+async def get_metrics():
+    snapshot = metrics.snapshot()
+    # Per-worker memory, to confirm the preloaded model stays shared
+    snapshot["memory"] = {"pid": os.getpid(), **process_memory()}
+    return snapshot
     
 if __name__ == "__main__":
     import uvicorn
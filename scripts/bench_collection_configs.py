@@ -0,0 +1,141 @@
+# scripts/bench_collection_configs.py
+"""
+Compare HNSW and quantization settings for the articles collection.
+
+Points are copied from `articles` into one temporary collection per
+configuration. Every query is then run at each hnsw_ef and reports recall@k
+against exact brute-force cosine top-k, plus latency.
+
+    python scripts/bench_collection_configs.py --m 16 32 --quantization none scalar binary --ef 64 128 256
+    python scripts/bench_collection_configs.py --queries queries.txt --k 10
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import argparse
+import asyncio
+import itertools
+import time
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.vector_store import collection_config, search_params
+
+SOURCE = "articles"
+# Approximate bytes per dimension kept in RAM for HNSW traversal
+RAM_PER_DIM = {"none": 4, "scalar": 1, "binary": 1 / 8}
+
+def load_points(client: QdrantClient, limit: int):
+    ids, vectors, payloads = [], [], []
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=SOURCE,
+            limit=1000,
+            offset=offset,
+            with_vectors=True,
+            with_payload=True
+        )
+        for point in points:
+            ids.append(point.id)
+            vectors.append(point.vector)
+            payloads.append(point.payload)
+        if offset is None or (limit and len(ids) >= limit):
+            break
+    if limit:
+        ids, vectors, payloads = ids[:limit], vectors[:limit], payloads[:limit]
+    return ids, np.asarray(vectors, dtype=np.float32), payloads
+
+def load_queries(path: str, vectors: np.ndarray, count: int) -> np.ndarray:
+    if path:
+        from app.services.embedding import EmbeddingService
+        from app.services.dim_reduction import DimensionReducer
+        with open(path, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+        embeddings = asyncio.run(EmbeddingService().get_embeddings(texts))
+        return DimensionReducer().transform(embeddings).astype(np.float32)
+    # Without a query file, perturbed stored vectors stand in for queries
+    rng = np.random.default_rng(0)
+    sample = vectors[rng.choice(len(vectors), size=min(count, len(vectors)), replace=False)]
+    return sample + rng.normal(scale=0.05 * np.abs(sample).mean(), size=sample.shape).astype(np.float32)
+
+def exact_top_k(queries: np.ndarray, vectors: np.ndarray, k: int) -> np.ndarray:
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = (queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ normalized.T
+    return np.argpartition(-scores, kth=k - 1, axis=1)[:, :k]
+
+def build_collection(client: QdrantClient, name: str, m: int, quantization: str, ids, vectors, payloads):
+    client.delete_collection(name)
+    client.create_collection(
+        collection_name=name,
+        # A tiny indexing threshold makes Qdrant build the HNSW graph even for small corpora
+        optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1),
+        **collection_config(m=m, quantization=quantization, size=vectors.shape[1])
+    )
+    client.upload_collection(
+        collection_name=name,
+        vectors=vectors,
+        payload=payloads,
+        ids=ids,
+        batch_size=256,
+        wait=True
+    )
+    while client.get_collection(name).status != models.CollectionStatus.GREEN:
+        time.sleep(0.5)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--m", type=int, nargs="+", default=[settings.QDRANT_HNSW_M])
+    parser.add_argument("--quantization", nargs="+", default=["none", "scalar", "binary"])
+    parser.add_argument("--ef", type=int, nargs="+", default=[64, 128, 256])
+    parser.add_argument("--oversampling", type=float, default=settings.QDRANT_OVERSAMPLING)
+    parser.add_argument("--queries", default="", help="File with one query per line")
+    parser.add_argument("--query-count", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=0, help="Only copy the first N points")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary collections")
+    args = parser.parse_args()
+
+    client = QdrantClient(settings.QDRANT_CLIENT_URL, port=settings.QDRANT_CLIENT_PORT)
+    ids, vectors, payloads = load_points(client, args.limit)
+    queries = load_queries(args.queries, vectors, args.query_count)
+    expected = exact_top_k(queries, vectors, args.k)
+    logger.info(f"Loaded {len(ids)} points ({vectors.shape[1]} dims), {len(queries)} queries")
+
+    for m, quantization in itertools.product(args.m, args.quantization):
+        name = f"{SOURCE}_bench_m{m}_{quantization}"
+        build_collection(client, name, m, quantization, ids, vectors, payloads)
+        rescore_options = [False, True] if quantization != "none" else [True]
+
+        for ef, rescore in itertools.product(args.ef, rescore_options):
+            params = search_params(hnsw_ef=ef, oversampling=args.oversampling, rescore=rescore)
+            latencies, recalls = [], []
+            for query, truth in zip(queries, expected):
+                started = time.perf_counter()
+                hits = client.query_points(
+                    collection_name=name,
+                    query=query.tolist(),
+                    limit=args.k,
+                    search_params=params
+                ).points
+                latencies.append((time.perf_counter() - started) * 1000)
+                expected_ids = {ids[i] for i in truth}
+                recalls.append(len(expected_ids & {hit.id for hit in hits}) / args.k)
+
+            latencies.sort()
+            ram_mb = len(ids) * vectors.shape[1] * RAM_PER_DIM[quantization] / 2 ** 20
+            logger.info(
+                f"m={m:<3d} quant={quantization:6s} ef={ef:<4d} rescore={str(rescore):5s}  "
+                f"recall@{args.k}={np.mean(recalls):.3f}  "
+                f"p50={latencies[len(latencies) // 2]:6.2f}ms p99={latencies[int(len(latencies) * 0.99)]:6.2f}ms  "
+                f"vector RAM~{ram_mb:.1f}MB"
+            )
+
+        if not args.keep:
+            client.delete_collection(name)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# scripts/bench_embedding_backends.py
+"""
+Parity check and throughput benchmark for the embedding backends.
+
+Every backend is compared against the torch output with cosine similarity; the
+script exits non-zero when a backend falls below --min-cosine. The same
+parity is asserted on a fixed corpus by tests/test_embedding_backends.py.
+
+    python scripts/bench_embedding_backends.py --backends torch onnx onnx-int8
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import argparse
+import time
+import numpy as np
+from transformers import AutoTokenizer
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.embedding_backends import create_backend
+
+SAMPLE_TEXTS = [
+    "오늘의 요리: 간단한 김치찌개 레시피",
+    "가을 여행지 추천, 단풍이 아름다운 국내 명소 10곳",
+    "A quick guide to brewing pour-over coffee at home",
+    "매거진 에디터가 고른 이번 주의 전시회",
+    "How to keep houseplants alive through the winter",
+    "서울 근교 캠핑장 비교: 시설, 가격, 예약 팁까지 한 번에 정리했습니다. " * 8,
+    "Interview: the designer behind this season's most talked-about collection",
+    "짧은 글",
+]
+
+def load_texts(path: str, count: int) -> list:
+    if path:
+        with open(path, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = SAMPLE_TEXTS
+    return [texts[i % len(texts)] for i in range(count)]
+
+def encode(backend, tokenizer, texts: list, batch_size: int) -> np.ndarray:
+    rows = []
+    for start in range(0, len(texts), batch_size):
+        inputs = tokenizer(
+            texts[start:start + batch_size],
+            padding=True,
+            truncation=True,
+            return_tensors="np"
+        )
+        rows.append(backend.encode(dict(inputs)))
+    return np.concatenate(rows)
+
+def cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return np.sum(a * b, axis=1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--texts", default="", help="File with one text per line (defaults to built-in samples)")
+    parser.add_argument("--count", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=settings.EMBEDDING_BULK_BATCH_SIZE)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(settings.EMBEDDING_MODEL)
+    texts = load_texts(args.texts, args.count)
+    parity_texts = texts[:64]
+
+    reference = encode(create_backend("torch", settings.EMBEDDING_MODEL, tokenizer), tokenizer, parity_texts, args.batch_size)
+
+    failed = False
+    for name in args.backends:
+        backend = create_backend(name, settings.EMBEDDING_MODEL, tokenizer)
+        # Warm up once so one-time graph optimisation is not timed
+        encode(backend, tokenizer, texts[:args.batch_size], args.batch_size)
+
+        similarity = cosine(encode(backend, tokenizer, parity_texts, args.batch_size), reference)
+
+        started = time.perf_counter()
+        encode(backend, tokenizer, texts, args.batch_size)
+        elapsed = time.perf_counter() - started
+
+        status = "ok" if similarity.min() >= args.min_cosine else "FAIL"
+        failed = failed or status == "FAIL"
+        logger.info(
+            f"{name:10s} {len(texts) / elapsed:8.1f} texts/s  "
+            f"cosine min={similarity.min():.4f} mean={similarity.mean():.4f}  [{status}]"
+        )
+
+    if failed:
+        logger.error(f"At least one backend fell below cosine {args.min_cosine}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
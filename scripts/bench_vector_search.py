@@ -0,0 +1,75 @@
+# scripts/bench_vector_search.py
+"""
+Benchmark concurrent searches against the articles collection:
+
+  sync-in-async  the old path, a blocking QdrantClient call inside `async def`
+  async-rest     the app's client (vector_store.create_client) over REST
+  async-grpc     the app's client over gRPC
+
+    python scripts/bench_vector_search.py --requests 500 --concurrency 32
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import argparse
+import asyncio
+import time
+import numpy as np
+from qdrant_client import QdrantClient
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.dim_reduction import vector_dim
+from app.services.vector_store import create_client
+
+COLLECTION = "articles"
+
+async def run(search, queries: np.ndarray, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(query):
+        async with semaphore:
+            started = time.perf_counter()
+            await search(query)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(query) for query in queries))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return len(queries) / elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((args.requests, vector_dim())).astype(np.float32)
+
+    sync_client = QdrantClient(settings.QDRANT_CLIENT_URL, port=settings.QDRANT_CLIENT_PORT)
+
+    async def sync_in_async(query):
+        sync_client.query_points(collection_name=COLLECTION, query=query.tolist(), limit=args.limit)
+
+    clients = {"sync-in-async": sync_in_async}
+    for name, prefer_grpc in (("async-rest", False), ("async-grpc", True)):
+        # Same pool limits as the app, so the numbers reflect production
+        client = create_client(prefer_grpc=prefer_grpc)
+
+        async def native_async(query, client=client):
+            await client.query_points(collection_name=COLLECTION, query=query.tolist(), limit=args.limit)
+
+        clients[name] = native_async
+
+    for name, search in clients.items():
+        # Warm up connections before timing
+        await run(search, queries[:args.concurrency], args.concurrency)
+        throughput, p50, p99 = await run(search, queries, args.concurrency)
+        logger.info(f"{name:14s} {throughput:8.1f} req/s  p50={p50:6.1f}ms  p99={p99:6.1f}ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+# scripts/dim_reduction.py
+"""
+Fit a PCA projection on the article corpus and compare recall@k of reduced
+vectors (PCA and prefix truncation) against the full EMBEDDING_DIM vectors.
+
+Article titles are used as queries; an article's score is its best chunk.
+
+    python scripts/dim_reduction.py --dims 64 128 256 --k 10
+    python scripts/dim_reduction.py --dims 256 --save-pca 256
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import argparse
+import asyncio
+import numpy as np
+from app.core.database import SessionLocal
+from app.core.logging import logger
+from app.models import Article
+from app.services.embedding import EmbeddingService
+from app.services.dim_reduction import fit_pca, save_pca, pca_path
+
+def load_articles(limit: int) -> list:
+    db = SessionLocal()
+    try:
+        query = db.query(Article.id, Article.title, Article.content_text).order_by(Article.created_at)
+        if limit:
+            query = query.limit(limit)
+        return query.all()
+    finally:
+        db.close()
+
+async def embed_corpus(embedding_service: EmbeddingService, articles: list):
+    """Return (chunk vectors, owning article index per chunk, title query vectors)"""
+    chunks, owners = [], []
+    for index, article in enumerate(articles):
+        for chunk in embedding_service.chunk_text(article.content_text or ""):
+            chunks.append(chunk)
+            owners.append(index)
+    corpus = await embedding_service.get_embeddings(chunks)
+    queries = await embedding_service.get_embeddings([article.title for article in articles])
+    return corpus, np.array(owners), queries
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+def top_articles(queries: np.ndarray, corpus: np.ndarray, owners: np.ndarray, k: int) -> np.ndarray:
+    """Top-k article indices per query, scoring each article by its best chunk"""
+    chunk_scores = normalize(queries) @ normalize(corpus).T
+    # Chunks are stored article by article, so each article is one contiguous run
+    starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+    article_scores = np.maximum.reduceat(chunk_scores, starts, axis=1)
+    return np.argpartition(-article_scores, kth=k - 1, axis=1)[:, :k]
+
+def recall_at_k(expected: np.ndarray, actual: np.ndarray) -> float:
+    hits = [len(set(e) & set(a)) / len(e) for e, a in zip(expected, actual)]
+    return float(np.mean(hits))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dims", type=int, nargs="+", default=[64, 128, 256])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--limit", type=int, default=0, help="Only use the first N articles")
+    parser.add_argument("--save-pca", type=int, default=0, help="Persist the PCA projection for this dim")
+    args = parser.parse_args()
+
+    articles = load_articles(args.limit)
+    if len(articles) <= args.k:
+        logger.error(f"Need more than k={args.k} articles, found {len(articles)}")
+        sys.exit(1)
+
+    embedding_service = EmbeddingService()
+    corpus, owners, queries = asyncio.run(embed_corpus(embedding_service, articles))
+    logger.info(f"Embedded {len(articles)} articles as {len(corpus)} chunks ({corpus.shape[1]} dims)")
+
+    expected = top_articles(queries, corpus, owners, args.k)
+
+    max_dim = max(args.dims + [args.save_pca])
+    mean, components, explained = fit_pca(corpus, max_dim)
+
+    for dim in sorted(args.dims):
+        # PCA components are ordered, so the first `dim` rows are the dim-d projection
+        projection = components[:dim]
+        pca_recall = recall_at_k(expected, top_articles(
+            (queries - mean) @ projection.T, (corpus - mean) @ projection.T, owners, args.k
+        ))
+        truncate_recall = recall_at_k(expected, top_articles(
+            queries[:, :dim], corpus[:, :dim], owners, args.k
+        ))
+        logger.info(
+            f"dim={dim:4d}  recall@{args.k} pca={pca_recall:.3f} truncate={truncate_recall:.3f}  "
+            f"explained variance={explained[:dim].sum():.3f}  "
+            f"storage={dim / corpus.shape[1]:.0%} of full"
+        )
+
+    if args.save_pca:
+        save_pca(pca_path(args.save_pca), mean, components[:args.save_pca])
+
+if __name__ == "__main__":
+    main()
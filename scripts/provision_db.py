@@ -0,0 +1,148 @@
+# scripts/provision_db.py
+"""
+Bring an existing database up to the current models without dropping data.
+
+Installs the extensions the app needs, creates missing tables (e.g.
+index_outbox, which every article write inserts into), adds missing
+nullable columns to existing ones, and builds missing indexes (the
+lexical GIN indexes, the /articles/list keyset indexes, ...) with CREATE
+INDEX CONCURRENTLY so article writes are not blocked while they build.
+EXPLAIN then confirms that search and list queries use them. Safe to run repeatedly. scripts/reset_db.py is the destructive
+alternative for fresh environments.
+
+    python scripts/provision_db.py
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from datetime import datetime, timezone
+from uuid import uuid4
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.schema import CreateIndex
+from app.models import Article, Base
+from app.models.article import article_tsvector
+from app.core.logging import logger
+from app.core.config import settings
+from app.services.hybrid_search import lexical_statement
+from app.services.functions.article_functions import encode_list_cursor, list_statement
+
+EXTENSIONS = ("uuid-ossp", "pg_trgm")
+LEXICAL_INDEXES = ("ix_articles_fts", "ix_articles_title_trgm", "ix_articles_content_trgm")
+# /articles/list filter -> the composite index its keyset pages must range-scan
+KEYSET_INDEXES = {
+    None: "ix_articles_created_at_id",
+    "user_id": "ix_articles_user_id_created_at_id",
+    "username": "ix_articles_username_created_at_id"
+}
+
+def ensure_extensions(engine):
+    with engine.begin() as connection:
+        for extension in EXTENSIONS:
+            connection.execute(text(f'CREATE EXTENSION IF NOT EXISTS "{extension}"'))
+    logger.info(f"Extensions installed: {', '.join(EXTENSIONS)}")
+
+def ensure_tables(engine):
+    """Create tables that do not exist yet, together with their indexes"""
+    existing = set(inspect(engine).get_table_names())
+    missing = [table for table in Base.metadata.sorted_tables if table.name not in existing]
+    Base.metadata.create_all(bind=engine, tables=missing)
+    for table in missing:
+        logger.info(f"Created table {table.name}")
+
+def ensure_columns(engine) -> bool:
+    """Add columns missing from existing tables; only nullable ones can be added blindly"""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    ok = True
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable and column.server_default is None:
+                logger.error(f"{table.name}.{column.name} is NOT NULL without a server default; add it by hand")
+                ok = False
+                continue
+            with engine.begin() as connection:
+                connection.execute(text(
+                    f'ALTER TABLE "{table.name}" ADD COLUMN IF NOT EXISTS "{column.name}" '
+                    f"{column.type.compile(dialect=engine.dialect)}"
+                ))
+            logger.info(f"Added column {table.name}.{column.name}")
+    return ok
+
+def ensure_indexes(engine):
+    """Build indexes missing from existing tables, without locking out writes"""
+    inspector = inspect(engine)
+    autocommit = engine.execution_options(isolation_level="AUTOCOMMIT")
+    for table in Base.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name in existing:
+                continue
+            index.dialect_kwargs["postgresql_concurrently"] = True
+            logger.info(f"Building index {index.name} on {table.name}")
+            # CONCURRENTLY cannot run inside a transaction block
+            with autocommit.connect() as connection:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+
+def explain(engine, statement) -> str:
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as connection:
+        # Small tables would always get a sequential scan otherwise
+        connection.execute(text("SET enable_seqscan = off"))
+        # Already rendered for the driver (escaped %), so bypass text() parsing
+        return "\n".join(row[0] for row in connection.exec_driver_sql(f"EXPLAIN {sql}"))
+
+def check_keyset_indexes(engine) -> bool:
+    """EXPLAIN a deep /articles/list page per filter and confirm it scans its composite index"""
+    cursor = encode_list_cursor(Article(created_at=datetime.now(timezone.utc), id=uuid4()))
+    ok = True
+    for field, index_name in KEYSET_INDEXES.items():
+        filters = {"user_id": uuid4()} if field == "user_id" else {"username": "index check"} if field else {}
+        plan = explain(engine, list_statement(cursor=cursor, **filters))
+        if index_name not in plan:
+            logger.error(f"Keyset pagination by {field or 'created_at'} cannot use {index_name}:\n{plan}")
+            ok = False
+    if ok:
+        logger.info("Keyset pagination plans use their composite indexes")
+    return ok
+
+def check_lexical_indexes(engine) -> bool:
+    """EXPLAIN the lexical search query and confirm every predicate can use its GIN index"""
+    statement = lexical_statement("index check")
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    # The full-text index only matches if the query renders the indexed expression verbatim
+    expression = str(article_tsvector().compile(dialect=engine.dialect))
+    if expression not in sql:
+        logger.error(f"Lexical query does not use the indexed tsvector expression {expression}")
+        return False
+    plan = explain(engine, statement)
+    missing = [name for name in LEXICAL_INDEXES if name not in plan]
+    if missing:
+        logger.error(f"Lexical search cannot use {', '.join(missing)}:\n{plan}")
+        return False
+    logger.info("Lexical search plan uses all GIN indexes")
+    return True
+
+def provision(engine) -> bool:
+    try:
+        ensure_extensions(engine)
+        ensure_tables(engine)
+        columns_ok = ensure_columns(engine)
+        ensure_indexes(engine)
+        lexical_ok = check_lexical_indexes(engine)
+        return check_keyset_indexes(engine) and lexical_ok and columns_ok
+    except Exception as e:
+        logger.error(f"Error provisioning database: {e}")
+        return False
+
+if __name__ == "__main__":
+    logger.info("Provisioning database...")
+    if not provision(create_engine(settings.DATABASE_URL)):
+        logger.error("Database provisioning failed")
+        sys.exit(1)
+    logger.info("Database is up to date")
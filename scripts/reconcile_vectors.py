@@ -0,0 +1,49 @@
+# scripts/reconcile_vectors.py
+"""
+Reconcile the vector store with Postgres: re-embed articles that have no
+vectors and delete vectors whose article no longer exists.
+
+    python scripts/reconcile_vectors.py --dry-run
+    python scripts/reconcile_vectors.py --batch-size 2000
+    python scripts/reconcile_vectors.py --every 3600    # keep running, once an hour
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import argparse
+import asyncio
+from app.core.logging import logger
+from app.services.container import services
+from app.services.reconciler import Reconciler
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=0, help="Defaults to RECONCILE_BATCH_SIZE")
+    parser.add_argument("--dry-run", action="store_true", help="Only report differences")
+    parser.add_argument("--every", type=float, default=0, help="Repeat every N seconds")
+    args = parser.parse_args()
+
+    vector_store = await services.get_vector_store()
+    embedding_service = await services.get_embedding_service()
+    while True:
+        try:
+            report = await Reconciler(vector_store, embedding_service, args.batch_size, args.dry_run).run()
+            logger.info(
+                f"{report.postgres_articles} articles, {report.indexed_articles} indexed: "
+                f"{report.missing} missing, {report.orphaned} orphaned, "
+                f"{report.reindexed} reindexed, {report.deleted} deleted in {report.seconds:.1f}s"
+            )
+            if report.reindexed or report.deleted:
+                search_cache = await services.get_search_cache()
+                await search_cache.invalidate()
+        except Exception as e:
+            logger.error(f"Reconcile failed: {e}")
+            if not args.every:
+                sys.exit(1)
+        if not args.every:
+            break
+        await asyncio.sleep(args.every)
+
+if __name__ == "__main__":
+    asyncio.run(main())
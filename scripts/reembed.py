@@ -0,0 +1,222 @@
+# scripts/reembed.py
+"""
+Blue/green re-embedding. Builds a new `articles_v{n}` collection from Postgres
+with the current EMBEDDING_MODEL / EMBEDDING_DIM settings, then atomically
+points the `articles` alias at it. Searches keep using the old collection for
+the whole build.
+
+Articles are streamed in id order through a server-side cursor, embedded in
+batches and bulk upserted while the next batch is being embedded. Progress is
+checkpointed after every batch, so an interrupted build can be resumed.
+Changes made during the build are caught up before and after the switch.
+Query vectors must come from the same model as the collection, so when the
+model changes, build with --no-switch, then run --resume while rolling the API
+onto the new settings.
+
+    python scripts/reembed.py                  # build the next version and switch
+    python scripts/reembed.py --resume         # continue an interrupted build
+    python scripts/reembed.py --no-switch      # build only; rerun with --resume to switch
+    python scripts/reembed.py --drop-old       # delete the previous collection after switching
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import argparse
+import asyncio
+import json
+import re
+import time
+from datetime import datetime, timezone
+from itertools import islice
+from uuid import UUID
+from qdrant_client.http import models
+from sqlalchemy import or_
+from sqlalchemy.orm import Query, load_only
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.logging import logger
+from app.models import Article
+from app.services.container import services
+from app.services.functions.article_functions import article_payload
+from app.services.reconciler import Reconciler
+from app.services.vector_store import VectorStore, collection_config, switch_alias, alias_target
+
+ALIAS = "articles"
+CHECKPOINT = Path(settings.STORAGE_PATH) / "reembed" / "checkpoint.json"
+
+def load_checkpoint() -> dict:
+    if not CHECKPOINT.exists():
+        return {}
+    with open(CHECKPOINT, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_checkpoint(state: dict):
+    CHECKPOINT.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = CHECKPOINT.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    tmp_path.replace(CHECKPOINT)
+
+async def next_collection_name(client) -> str:
+    names = [collection.name for collection in (await client.get_collections()).collections]
+    versions = [int(match.group(1)) for name in names if (match := re.fullmatch(rf"{ALIAS}_v(\d+)", name))]
+    return f"{ALIAS}_v{max(versions, default=0) + 1}"
+
+async def create_collection(store: VectorStore):
+    """Create the target with HNSW disabled (m=0); building the graph once at the end is much cheaper"""
+    config = collection_config()
+    config["hnsw_config"] = models.HnswConfigDiff(m=0, ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT)
+    await store.client.create_collection(collection_name=store.collection_name, **config)
+    await store._ensure_payload_indexes()
+    logger.info(f"Created collection {store.collection_name}")
+
+async def reembed(store: VectorStore, embedding_service, query, batch_size: int, on_batch=None) -> int:
+    """Embed and upsert every article of `query`; the next batch is embedded while the last one is written"""
+    columns = load_only(
+        Article.id, Article.title, Article.content_text, Article.user_id,
+        Article.username, Article.created_at, Article.article_metadata
+    )
+    db = SessionLocal()
+    try:
+        rows = iter(query.with_session(db).options(columns).order_by(Article.id).yield_per(batch_size))
+        pending = None
+        total = 0
+        while True:
+            articles = await asyncio.to_thread(lambda: list(islice(rows, batch_size)))
+            embeddings = await embedding_service.embed_documents(
+                [article.content_text for article in articles]
+            ) if articles else []
+            if pending is not None:
+                await pending[0]
+                if on_batch is not None:
+                    on_batch(pending[1], pending[2])
+            if not articles:
+                break
+
+            upserts = {
+                str(article.id): (vectors, article_payload(article))
+                for article, vectors in zip(articles, embeddings)
+                if len(vectors)
+            }
+            chunks = sum(len(vectors) for vectors, _ in upserts.values())
+            pending = (asyncio.create_task(store.apply_batch(upserts, wait=True)), articles, chunks)
+            total += len(articles)
+        return total
+    finally:
+        db.close()
+
+async def build(store: VectorStore, embedding_service, state: dict, batch_size: int):
+    db = SessionLocal()
+    try:
+        remaining = await asyncio.to_thread(_articles_query(state["last_id"]).with_session(db).count)
+    finally:
+        db.close()
+    logger.info(f"Embedding {remaining} articles into {state['collection']}")
+
+    started = time.perf_counter()
+    done = 0
+
+    def on_batch(articles, chunks):
+        nonlocal done
+        done += len(articles)
+        state["last_id"] = str(articles[-1].id)
+        state["articles"] += len(articles)
+        state["chunks"] += chunks
+        save_checkpoint(state)
+        rate = done / max(time.perf_counter() - started, 1e-9)
+        logger.info(
+            f"{done}/{remaining} articles ({rate:.1f}/s, {state['chunks']} chunks), "
+            f"ETA {(remaining - done) / max(rate, 1e-9):.0f}s"
+        )
+
+    await reembed(store, embedding_service, _articles_query(state["last_id"]), batch_size, on_batch)
+
+def _articles_query(after_id=None, changed_since=None) -> Query:
+    """Unbound article query; callers attach a session with with_session()"""
+    query = Query(Article)
+    if after_id:
+        query = query.filter(Article.id > UUID(after_id))
+    if changed_since:
+        since = datetime.fromisoformat(changed_since)
+        query = query.filter(or_(Article.created_at >= since, Article.updated_at >= since))
+    return query
+
+async def catch_up(store: VectorStore, embedding_service, since: str, batch_size: int) -> int:
+    """Re-embed articles created or updated since `since` (writes made during the build)"""
+    count = await reembed(store, embedding_service, _articles_query(changed_since=since), batch_size)
+    logger.info(f"Caught up {count} articles changed since {since}")
+    return count
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=settings.EMBEDDING_BULK_BATCH_SIZE)
+    parser.add_argument("--resume", action="store_true", help="Continue from the last checkpoint")
+    parser.add_argument("--no-switch", action="store_true", help="Build without repointing the alias")
+    parser.add_argument("--drop-old", action="store_true", help="Delete the previous collection after switching")
+    args = parser.parse_args()
+
+    if settings.VECTOR_STORE_BACKEND != "qdrant":
+        logger.error("Blue/green re-embedding needs the qdrant vector store backend")
+        sys.exit(1)
+
+    embedding_service = await services.get_embedding_service()
+    alias_store = VectorStore(ALIAS)
+    state = load_checkpoint() if args.resume else {}
+    if state:
+        if (state["model"], state["dim"]) != (settings.EMBEDDING_MODEL, settings.EMBEDDING_DIM):
+            logger.error(f"Checkpoint was built with {state['model']} ({state['dim']} dims); settings differ")
+            sys.exit(1)
+        logger.info(f"Resuming {state['collection']} after {state['articles']} articles")
+    else:
+        state = {
+            "collection": await next_collection_name(alias_store.client),
+            "model": settings.EMBEDDING_MODEL,
+            "dim": settings.EMBEDDING_DIM,
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "last_id": None,
+            "articles": 0,
+            "chunks": 0,
+            "built": False
+        }
+
+    store = VectorStore(state["collection"])
+    if not await store.client.collection_exists(store.collection_name):
+        await create_collection(store)
+    save_checkpoint(state)
+
+    if not state["built"]:
+        await build(store, embedding_service, state, args.batch_size)
+        # Build the HNSW graph now that all points are in
+        await store.client.update_collection(
+            collection_name=store.collection_name,
+            hnsw_config=models.HnswConfigDiff(m=settings.QDRANT_HNSW_M)
+        )
+        while (await store.client.get_collection(store.collection_name)).status != models.CollectionStatus.GREEN:
+            await asyncio.sleep(1)
+        state["built"] = True
+        save_checkpoint(state)
+        logger.info(f"Built {store.collection_name}: {state['articles']} articles, {state['chunks']} chunks")
+
+    if args.no_switch:
+        logger.info("Build finished; rerun with --resume to switch the alias")
+        return
+
+    # Catch up on writes made during the build, switch, then catch up on the ones made meanwhile
+    switch_started = datetime.now(timezone.utc).isoformat()
+    await catch_up(store, embedding_service, state["started_at"], args.batch_size)
+    previous = await switch_alias(alias_store.client, ALIAS, store.collection_name)
+    await catch_up(store, embedding_service, switch_started, args.batch_size)
+    # Deletes made during the build only show up as orphaned points
+    await Reconciler(alias_store, embedding_service).run()
+    search_cache = await services.get_search_cache()
+    await search_cache.invalidate()
+
+    if args.drop_old and previous not in (None, ALIAS, store.collection_name):
+        await store.client.delete_collection(previous)
+        logger.info(f"Dropped previous collection {previous}")
+    CHECKPOINT.unlink(missing_ok=True)
+    logger.info(f"{ALIAS} now serves {await alias_target(store.client, ALIAS)}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
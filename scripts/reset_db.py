@@ -8,12 +8,10 @@ from sqlalchemy import create_engine, text
 from app.models import Base
 from app.core.logging import logger
 from app.core.config import settings
-from qdrant_client import QdrantClient
+from app.services.container import services
 import asyncio
 
-from qdrant_client.http import models
-from app.core.config import QDRANT_CLIENT_URL, QDRANT_CLIENT_PORT
-from app.core.config import EMBEDDING_DIM
+from provision_db import check_lexical_indexes
 
 def reset_postgresql():
     """Reset database and create tables"""
@@ -27,6 +25,7 @@ def reset_postgresql():
             connection.execute(text("GRANT ALL ON SCHEMA public TO postgres"))
             connection.execute(text("GRANT ALL ON SCHEMA public TO public"))
             connection.execute(text("CREATE EXTENSION IF NOT EXISTS \"uuid-ossp\""))
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
             connection.commit()
             logger.info("Reset schema")
             
@@ -34,7 +33,7 @@ def reset_postgresql():
         Base.metadata.create_all(bind=engine)
         logger.info("Created all tables")
         
-        return True
+        return check_lexical_indexes(engine)
     except Exception as e:
         logger.error(f"Error resetting database: {e}")
         return False
@@ -42,55 +41,21 @@ def reset_postgresql():
 
 
 
-class VectorStore:
-    def __init__(self):
-        self.client = QdrantClient(QDRANT_CLIENT_URL, port=QDRANT_CLIENT_PORT)
-        self.collection_name = "articles"
-        self._ensure_collection()
-
-    def _ensure_collection(self):
-        try:
-            self.client.get_collection(self.collection_name)
-        except Exception:
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=models.VectorParams(
-                    size=EMBEDDING_DIM,
-                    distance=models.Distance.COSINE
-                )
-            )
-            logger.info(f"Created collection: {self.collection_name}")
-
-    async def reset_collection(self):
-        """Reset the articles collection"""
-        try:
-            # Delete if exists
-            try:
-                self.client.delete_collection(self.collection_name)
-            except Exception:
-                pass
-            # Create new collection
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=models.VectorParams(
-                    size=EMBEDDING_DIM,
-                    distance=models.Distance.COSINE
-                )
-            )
-            logger.info(f"Reset collection: {self.collection_name}")
-        except Exception as e:
-            logger.error(f"Error resetting collection: {e}")
-            raise
-
-
+async def reset_qdrant() -> bool:
+    """Recreate the articles collection with the app's own collection config"""
+    try:
+        vector_store = await services.get_vector_store()
+        await vector_store.reset_collection()
+        return True
+    except Exception as e:
+        logger.error(f"Error resetting vector store: {e}")
+        return False
 
 if __name__ == "__main__":
     logger.info("Starting database reset...")
     
     pg_success = reset_postgresql()
-    # qdrant_success = reset_qdrant()
-    vector_store = VectorStore()
-    qdrant_success = asyncio.run(vector_store.reset_collection())
+    qdrant_success = asyncio.run(reset_qdrant())
     
     if pg_success and qdrant_success:
         logger.info("Successfully reset all databases")
@@ -0,0 +1,52 @@
+# scripts/run_indexer.py
+"""
+Run the outbox indexer as its own process, e.g. when the API workers are
+started with INDEXER_ENABLED=false so they never load the drain loop.
+
+    python scripts/run_indexer.py
+    python scripts/run_indexer.py --once    # drain what is pending and exit
+    python scripts/run_indexer.py --redrive --once    # retry rows that ran out of attempts
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import argparse
+import asyncio
+import signal
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.container import services
+from app.services.indexer import redrive_dead_rows
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="Drain pending rows and exit")
+    parser.add_argument("--redrive", action="store_true", help="Re-queue rows that exhausted INDEXER_MAX_ATTEMPTS first")
+    args = parser.parse_args()
+    if settings.VECTOR_STORE_BACKEND == "local":
+        parser.error("VECTOR_STORE_BACKEND=local is single-process; run the indexer inside the API (INDEXER_ENABLED=true)")
+
+    if args.redrive:
+        await asyncio.to_thread(redrive_dead_rows)
+
+    embedding_service = await services.get_embedding_service()
+    await embedding_service.warmup()
+    indexer = await services.get_indexer()
+
+    if args.once:
+        total = 0
+        while drained := await indexer.drain_batch():
+            total += drained
+        logger.info(f"Indexed {total} outbox rows")
+    else:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        indexer.start()
+        await stop.wait()
+    await services.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
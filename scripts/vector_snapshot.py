@@ -0,0 +1,155 @@
+# scripts/vector_snapshot.py
+"""
+Export the articles collection to local files and restore it, so rebuilding
+Qdrant does not require re-running the embedding model.
+
+A snapshot directory holds:
+  vectors.npy      float32 (points x dim), memory-mappable with np.load(mmap_mode="r")
+  payload.json.gz  point ids plus one column per payload field
+  manifest.json    count, dim, model and source collection
+
+    python scripts/vector_snapshot.py export /backups/articles-2024-06-01
+    python scripts/vector_snapshot.py import /backups/articles-2024-06-01 --parallel 8
+    python scripts/vector_snapshot.py import /backups/articles-2024-06-01 --collection articles_v3 --recreate
+"""
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import argparse
+import asyncio
+import gzip
+import json
+import time
+from datetime import datetime, timezone
+import numpy as np
+from qdrant_client.http import models
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.vector_store import PAYLOAD_INDEXES, VectorStore, alias_target, collection_config
+
+def progress(label: str, done: int, total: int, started: float):
+    rate = done / max(time.perf_counter() - started, 1e-9)
+    logger.info(f"{label} {done}/{total} points ({rate:.0f}/s)")
+
+async def export_snapshot(store: VectorStore, path: Path, batch_size: int):
+    client = store.client
+    collection = await alias_target(client, store.collection_name) or store.collection_name
+    info = await client.get_collection(collection)
+    dim = info.config.params.vectors.size
+    total = (await client.count(collection_name=collection, exact=True)).count
+    path.mkdir(parents=True, exist_ok=True)
+
+    vectors = np.lib.format.open_memmap(path / "vectors.npy", mode="w+", dtype=np.float32, shape=(total, dim))
+    ids, payloads = [], []
+    offset, started = None, time.perf_counter()
+    while len(ids) < total:
+        points, offset = await client.scroll(
+            collection_name=collection,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        )
+        # Points added after count() are left for the next snapshot
+        points = points[:total - len(ids)]
+        if points:
+            vectors[len(ids):len(ids) + len(points)] = np.asarray([point.vector for point in points], dtype=np.float32)
+            ids.extend(str(point.id) for point in points)
+            payloads.extend(point.payload or {} for point in points)
+            progress("Exported", len(ids), total, started)
+        if offset is None:
+            break
+    vectors.flush()
+    del vectors
+
+    if len(ids) < total:
+        # Points deleted during the export; shrink the file to what was written
+        written = np.load(path / "vectors.npy", mmap_mode="r")[:len(ids)]
+        np.save(path / "vectors.tmp.npy", written)
+        del written
+        (path / "vectors.tmp.npy").replace(path / "vectors.npy")
+
+    fields = sorted({key for payload in payloads for key in payload})
+    columns = {field: [payload.get(field) for payload in payloads] for field in fields}
+    with gzip.open(path / "payload.json.gz", "wt", encoding="utf-8") as f:
+        json.dump({"ids": ids, "columns": columns}, f, ensure_ascii=False)
+
+    manifest = {
+        "collection": collection,
+        "count": len(ids),
+        "dim": dim,
+        "model": settings.EMBEDDING_MODEL,
+        "reduction": settings.EMBEDDING_REDUCTION,
+        "exported_at": datetime.now(timezone.utc).isoformat()
+    }
+    with open(path / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    logger.info(f"Exported {len(ids)} points ({dim} dims) from {collection} to {path}")
+
+async def import_snapshot(store: VectorStore, path: Path, batch_size: int, parallel: int, recreate: bool):
+    with open(path / "manifest.json", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest["model"] != settings.EMBEDDING_MODEL:
+        logger.warning(f"Snapshot was embedded with {manifest['model']}, settings use {settings.EMBEDDING_MODEL}")
+
+    vectors = np.load(path / "vectors.npy", mmap_mode="r")
+    with gzip.open(path / "payload.json.gz", "rt", encoding="utf-8") as f:
+        data = json.load(f)
+    ids, columns = data["ids"], data["columns"]
+
+    client = store.client
+    collection = await alias_target(client, store.collection_name) or store.collection_name
+    if recreate and await client.collection_exists(collection):
+        await client.delete_collection(collection)
+    if not await client.collection_exists(collection):
+        await client.create_collection(collection_name=collection, **collection_config(size=manifest["dim"]))
+        for field_name, field_schema in PAYLOAD_INDEXES.items():
+            await client.create_payload_index(
+                collection_name=collection,
+                field_name=field_name,
+                field_schema=field_schema
+            )
+        logger.info(f"Created collection {collection}")
+
+    semaphore = asyncio.Semaphore(parallel)
+    done, started = 0, time.perf_counter()
+
+    async def upsert(start: int):
+        nonlocal done
+        end = min(start + batch_size, len(ids))
+        # Build points only once a slot is free, so at most `parallel` batches are in memory
+        async with semaphore:
+            points = [
+                models.PointStruct(
+                    id=ids[i],
+                    vector=vectors[i].tolist(),
+                    payload={field: values[i] for field, values in columns.items() if values[i] is not None}
+                )
+                for i in range(start, end)
+            ]
+            await client.upsert(collection_name=collection, points=points, wait=True)
+        done += end - start
+        progress("Imported", done, len(ids), started)
+
+    await asyncio.gather(*(upsert(start) for start in range(0, len(ids), batch_size)))
+    logger.info(f"Imported {len(ids)} points into {collection} in {time.perf_counter() - started:.1f}s")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--collection", default="articles", help="Collection or alias (default: articles)")
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--parallel", type=int, default=4, help="Concurrent upsert requests on import")
+    parser.add_argument("--recreate", action="store_true", help="Drop the target collection before importing")
+    args = parser.parse_args()
+
+    store = VectorStore(args.collection)
+    if args.command == "export":
+        await export_snapshot(store, args.path, args.batch_size)
+    else:
+        await import_snapshot(store, args.path, args.batch_size, args.parallel, args.recreate)
+
+if __name__ == "__main__":
+    asyncio.run(main())
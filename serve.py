@@ -0,0 +1,69 @@
+"""
+Production entry point: gunicorn with uvicorn workers sharing one copy of the
+embedding weights.
+
+The master process loads EmbeddingService before forking and freezes the GC so
+the model's pages stay shared copy-on-write across workers.
+
+    python serve.py
+"""
+import gc
+import os
+from gunicorn.app.base import BaseApplication
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import process_memory
+
+def log_memory(label: str):
+    memory = process_memory()
+    logger.info(
+        f"{label} pid={os.getpid()} "
+        f"rss={memory.get('rss_kb', 0) / 1024:.0f}MB pss={memory.get('pss_kb', 0) / 1024:.0f}MB "
+        f"shared={(memory.get('shared_clean_kb', 0) + memory.get('shared_dirty_kb', 0)) / 1024:.0f}MB"
+    )
+
+def post_worker_init(worker):
+    log_memory("Worker started")
+
+class PreforkServer(BaseApplication):
+    def __init__(self, app, options: dict):
+        self.application = app
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+def main():
+    # The local index lives in one process's memory; forked workers would each get their own
+    if settings.VECTOR_STORE_BACKEND == "local" and settings.WORKERS > 1:
+        raise SystemExit(
+            f"VECTOR_STORE_BACKEND=local is single-process; set WORKERS=1 (got {settings.WORKERS}) or use qdrant"
+        )
+    from main import app
+    from app.services.container import services
+
+    # Load the weights in the master only. Inference (and with it torch's
+    # thread pools) waits until the workers warm up after the fork.
+    services.get("embedding_service")
+    log_memory("Master preloaded model")
+
+    # Objects alive now move to the permanent generation, so collections in
+    # the workers never write to (and un-share) the pages holding them
+    gc.collect()
+    gc.freeze()
+
+    PreforkServer(app, {
+        "bind": f"{settings.HOST}:{settings.PORT}",
+        "workers": settings.WORKERS,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "post_worker_init": post_worker_init,
+    }).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+torch <-> ONNX parity for the embedding backends: every backend must produce
+CLS vectors within a cosine threshold of the torch reference on a fixed corpus.
+
+Skipped when onnxruntime (or torch/transformers) is not installed. The ONNX
+export is written to a temporary directory unless EMBEDDING_ONNX_DIR is set.
+
+    python -m pytest tests/test_embedding_backends.py
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("onnxruntime")
+
+from transformers import AutoTokenizer
+from app.core.config import settings
+from app.services.embedding_backends import create_backend
+
+CORPUS = [
+    "오늘의 요리: 간단한 김치찌개 레시피",
+    "가을 여행지 추천, 단풍이 아름다운 국내 명소 10곳",
+    "A quick guide to brewing pour-over coffee at home",
+    "매거진 에디터가 고른 이번 주의 전시회",
+    "How to keep houseplants alive through the winter",
+    "서울 근교 캠핑장 비교: 시설, 가격, 예약 팁까지 한 번에 정리했습니다. " * 8,
+    "Interview: the designer behind this season's most talked-about collection",
+    "짧은 글",
+]
+
+# Minimum per-text cosine against torch; int8 weights cost a little precision
+MIN_COSINE = {"onnx": 0.999, "onnx-int8": 0.98}
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    return AutoTokenizer.from_pretrained(settings.EMBEDDING_MODEL)
+
+@pytest.fixture(scope="module")
+def onnx_dir(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as patch:
+        if not settings.EMBEDDING_ONNX_DIR:
+            patch.setattr(settings, "EMBEDDING_ONNX_DIR", str(tmp_path_factory.mktemp("onnx")))
+        yield settings.EMBEDDING_ONNX_DIR
+
+def encode(backend, tokenizer) -> np.ndarray:
+    inputs = tokenizer(CORPUS, padding=True, truncation=True, return_tensors="np")
+    vectors = backend.encode(dict(inputs))
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+@pytest.fixture(scope="module")
+def reference(tokenizer):
+    return encode(create_backend("torch", settings.EMBEDDING_MODEL, tokenizer), tokenizer)
+
+@pytest.mark.parametrize("name", sorted(MIN_COSINE))
+def test_backend_matches_torch(name, tokenizer, onnx_dir, reference):
+    vectors = encode(create_backend(name, settings.EMBEDDING_MODEL, tokenizer), tokenizer)
+
+    assert vectors.shape == reference.shape
+    similarity = np.sum(vectors * reference, axis=1)
+    assert similarity.min() >= MIN_COSINE[name], f"{name} cosine per text: {np.round(similarity, 4).tolist()}"